@@ -0,0 +1,192 @@
+import argparse
+
+import itertools
+
+import numpy as np
+
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+
+from data_reader import DataReader
+
+from precompute import BENCHMARKS, load_universe_prices
+
+from relative_rotation import resample_prices
+
+from rrg_engine import calculate_rrg_sweep
+
+from screener import QUADRANT_ORDER, quadrant_codes
+
+BARS_PER_YEAR = {"daily": 252, "weekly": 52, "monthly": 12}
+
+# Rule name -> (entry quadrants, exit quadrants). A held name stays held while it sits in a
+# quadrant that is in neither set, e.g. "improving_to_weakening" keeps it through Leading.
+RULES = {
+    "leading_improving": (("Leading", "Improving"), ("Weakening", "Lagging")),
+    "leading": (("Leading",), ("Improving", "Weakening", "Lagging")),
+    "improving_to_weakening": (("Improving",), ("Weakening", "Lagging")),
+}
+
+_PRICES = None
+_SYMBOLS = None
+
+
+def forward_fill(values):
+    # NaN cells of a (dates x symbols) matrix take the last non-NaN value above them.
+    rows = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(values, rows, axis=0)
+
+
+def first_signal_row(codes):
+    # First bar with any RRG value; the rebalance grid and the evaluation start there.
+    return int(np.argmax((codes >= 0).any(axis=1)))
+
+
+def rotation_weights(codes, entry, exit, rebalance=1):
+    # Equal weights over the names held on each rebalance bar, carried until the next one.
+    # Entry/exit is a state machine: 1 on entering, 0 on exiting, otherwise keep the state.
+    # Rebalance bars are first_signal_row(codes) + k * rebalance.
+    transitions = np.full(len(QUADRANT_ORDER) + 1, np.nan)
+    transitions[0] = 0.0  # no RRG value yet
+    transitions[[QUADRANT_ORDER.index(q) + 1 for q in exit]] = 0.0
+    transitions[[QUADRANT_ORDER.index(q) + 1 for q in entry]] = 1.0
+    held = np.nan_to_num(forward_fill(transitions[codes + 1]))
+    rows = np.arange(len(held))
+    start = first_signal_row(codes)
+    rows[start:] = start + (rows[start:] - start) // rebalance * rebalance
+    held = held[rows]
+    count = held.sum(axis=1, keepdims=True)
+    return np.divide(held, count, out=np.zeros_like(held), where=count > 0)
+
+
+class RotationBacktest:
+    # Price-side inputs for one (dates x symbols) panel and benchmark, computed once and
+    # reused by every rule, rebalance period and window run against the same prices.
+    def __init__(self, prices, benchmark, bars_per_year=252, cost_bps=0.0):
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.benchmark = np.asarray(benchmark, dtype=np.float64)
+        self.bars_per_year = bars_per_year
+        self.cost_bps = cost_bps
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.returns = np.zeros_like(self.prices)
+            self.returns[1:] = self.prices[1:] / self.prices[:-1] - 1
+            self.returns[~np.isfinite(self.returns)] = 0.0
+            self.bench_returns = np.zeros_like(self.benchmark)
+            self.bench_returns[1:] = self.benchmark[1:] / self.benchmark[:-1] - 1
+            self.bench_returns[~np.isfinite(self.bench_returns)] = 0.0
+
+    def run(self, codes, entry, exit, rebalance=1):
+        # Weights set on a bar's close earn the next bar's return; every symbol and bar is
+        # handled as array operations. Returns (equity curve, stats dict).
+        weights = rotation_weights(codes, entry, exit, rebalance)
+        turnover = np.zeros(len(weights))
+        turnover[1:] = 0.5 * np.abs(np.diff(weights, axis=0)).sum(axis=1)
+        strategy = np.zeros(len(weights))
+        strategy[1:] = np.einsum('ij,ij->i', weights[:-1], self.returns[1:]) - turnover[:-1] * self.cost_bps / 1e4
+
+        # Evaluate from the first bar with any RRG value.
+        start = first_signal_row(codes)
+        strategy, bench_returns, turnover = strategy[start:], self.bench_returns[start:], turnover[start:]
+        equity = np.cumprod(1 + strategy)
+        bench_equity = np.cumprod(1 + bench_returns)
+        years = max(len(strategy), 1) / self.bars_per_year
+
+        # Hit rate: share of (rebalance period, held name) pairs that beat the benchmark.
+        rebalance_rows = np.arange(start, len(self.prices), rebalance)
+        period_end = np.append(rebalance_rows[1:], len(self.prices) - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            symbol_period = self.prices[period_end] / self.prices[rebalance_rows] - 1
+            bench_period = self.benchmark[period_end] / self.benchmark[rebalance_rows] - 1
+        held = (weights[rebalance_rows] > 0) & ~np.isnan(symbol_period) & (period_end > rebalance_rows)[:, None]
+        hits = held & (symbol_period > bench_period[:, None])
+
+        volatility = strategy.std() * np.sqrt(self.bars_per_year)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        stats = {
+            "total_return": equity[-1] - 1 if len(equity) else 0.0,
+            "cagr": equity[-1] ** (1 / years) - 1 if len(equity) else 0.0,
+            "benchmark_return": bench_equity[-1] - 1 if len(bench_equity) else 0.0,
+            "excess_return": (equity[-1] - bench_equity[-1]) if len(equity) else 0.0,
+            "volatility": volatility,
+            "sharpe": strategy.mean() * self.bars_per_year / volatility if volatility > 0 else np.nan,
+            "max_drawdown": drawdown.min() if len(drawdown) else 0.0,
+            "turnover": turnover.sum() / years,
+            "hit_rate": hits.sum() / held.sum() if held.any() else np.nan,
+            "avg_holdings": (weights[start:] > 0).sum(axis=1).mean() if len(weights) > start else 0.0,
+        }
+        return equity, stats
+
+
+def backtest_rotation(prices, benchmark, rs_ratio, rs_momentum, entry, exit, rebalance=1, bars_per_year=252, cost_bps=0.0):
+    backtest = RotationBacktest(prices, benchmark, bars_per_year, cost_bps)
+    return backtest.run(quadrant_codes(rs_ratio, rs_momentum), entry, exit, rebalance)
+
+
+def _init_worker(prices, symbols):
+    global _PRICES, _SYMBOLS
+    _PRICES = prices
+    _SYMBOLS = symbols
+
+
+def _backtest_combination(job):
+    # One RRG sweep per (benchmark, frequency) in a worker process, then every window,
+    # rebalance period and rule against it.
+    benchmark, frequency, windows, rebalances, rules, cost_bps = job
+    prices = resample_prices(_PRICES, frequency)
+    symbols = [t for t in _SYMBOLS if t != benchmark]
+    sweep = calculate_rrg_sweep(prices[symbols], prices[benchmark], windows)
+    backtest = RotationBacktest(
+        prices[symbols].loc[sweep.dates], prices[benchmark].loc[sweep.dates],
+        bars_per_year=BARS_PER_YEAR[frequency], cost_bps=cost_bps
+    )
+    rows = []
+    for window in sweep.windows:
+        result = sweep.for_window(window)
+        codes = quadrant_codes(result.rs_ratio, result.rs_momentum)
+        for rebalance, rule in itertools.product(rebalances, rules):
+            _, stats = backtest.run(codes, *RULES[rule], rebalance=rebalance)
+            rows.append(dict(benchmark=benchmark, frequency=frequency, window=window, rebalance=rebalance, rule=rule, **stats))
+    return rows
+
+
+def backtest_grid(tickers, prices, benchmarks, windows, frequencies, rebalances, rules=tuple(RULES), cost_bps=0.0, max_workers=None):
+    # Every (benchmark, frequency, window, rebalance, rule) combination, ranked by Sharpe ratio.
+    benchmarks = [b for b in benchmarks if b in prices.columns]
+    symbols = [t for t in dict.fromkeys(tickers) if t in prices.columns]
+    jobs = [(b, f, list(windows), list(rebalances), list(rules), cost_bps) for b, f in itertools.product(benchmarks, frequencies)]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(prices, symbols)) as executor:
+        rows = [row for chunk in executor.map(_backtest_combination, jobs) for row in chunk]
+    return pd.DataFrame(rows).sort_values("sharpe", ascending=False).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest RRG quadrant rotation over a grid of parameters.")
+    parser.add_argument("universe", help="CSV with a 'ticker' column listing the symbols")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS)
+    parser.add_argument("--windows", nargs=2, type=int, default=[10, 50], metavar=("MIN", "MAX"))
+    parser.add_argument("--frequencies", nargs="+", choices=list(BARS_PER_YEAR), default=["daily", "weekly"])
+    parser.add_argument("--rebalance", nargs="+", type=int, default=[1, 5, 10, 20], help="rebalance every N bars")
+    parser.add_argument("--rules", nargs="+", choices=list(RULES), default=list(RULES))
+    parser.add_argument("--cost-bps", type=float, default=0.0, help="trading cost per unit of turnover")
+    parser.add_argument("--source", choices=["local", "yahoo"], default="local")
+    parser.add_argument("--local-path", default=None, help="folder of <ticker>.csv files for --source local")
+    parser.add_argument("--days", type=int, default=3650, help="calendar days of history for --source yahoo")
+    parser.add_argument("--cache", default=None, help="PriceCache SQLite file for --source yahoo")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="write the table to this CSV instead of printing the top rows")
+    args = parser.parse_args()
+    if args.source == "local" and not args.local_path:
+        parser.error("--local-path is required with --source local")
+
+    tickers = DataReader({'source_market_data': "", 'dest_tickers_data': ""}, combined_file=args.universe).read_tickers()
+    prices = load_universe_prices(tickers, args.benchmarks, args.source, args.local_path, args.days, args.cache)
+    table = backtest_grid(
+        tickers, prices, args.benchmarks, range(args.windows[0], args.windows[1] + 1), args.frequencies,
+        args.rebalance, args.rules, args.cost_bps, args.workers
+    )
+    if args.out:
+        table.to_csv(args.out, index=False)
+    else:
+        print(table.head(20).to_string(index=False))
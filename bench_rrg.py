@@ -0,0 +1,172 @@
+import os
+
+import gc
+
+import sys
+
+import json
+
+import time
+
+import platform
+
+import argparse
+
+import itertools
+
+import subprocess
+
+import tracemalloc
+
+import numpy as np
+
+import pandas as pd
+
+from relative_rotation import RelativeRotationData
+
+BARS_PER_YEAR = {"daily": 252, "weekly": 52, "monthly": 12}
+DATE_FREQ = {"daily": "B", "weekly": "W-MON", "monthly": "MS"}
+BENCHMARK = "BENCH"
+
+
+def synthetic_prices(n_symbols, years, frequency="daily", seed=0):
+    # Geometric random walks: (dates x symbols) prices plus one benchmark column.
+    rng = np.random.default_rng(seed)
+    n_bars = int(years * BARS_PER_YEAR[frequency])
+    dates = pd.date_range(end=pd.Timestamp("2025-01-03"), periods=n_bars, freq=DATE_FREQ[frequency], name="Date")
+    vol = 0.01 * np.sqrt(252 / BARS_PER_YEAR[frequency])
+    returns = rng.normal(0.0002, vol, size=(n_bars, n_symbols + 1))
+    prices = 50 * np.exp(np.cumsum(returns, axis=0))
+    columns = [f"SYM{i:05d}" for i in range(n_symbols)] + [BENCHMARK]
+    return pd.DataFrame(prices, index=dates, columns=columns)
+
+
+def synthetic_fetcher(panel):
+    # Offline stand-in for yf.download: slices the synthetic panel to the requested range.
+    def fetch(tickers, start, end, interval):
+        data = panel.loc[(panel.index >= pd.Timestamp(start)) & (panel.index < pd.Timestamp(end)), list(tickers)]
+        return pd.concat({"Close": data, "Volume": data * 0 + 1e6}, axis=1)
+    return fetch
+
+
+def measure(func, repeat):
+    # Best wall time over `repeat` runs and tracemalloc peak of the first run.
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    times = [time.perf_counter() - start]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), peak
+
+
+def run_case(n_symbols, years, frequency, repeat=3, tail_length=5, window=20, seed=0, compact=False):
+    panel = synthetic_prices(n_symbols, years, frequency, seed)
+    symbols = [c for c in panel.columns if c != BENCHMARK]
+    obj = RelativeRotationData(
+        symbols=symbols,
+        benchmark=BENCHMARK,
+        tail_length=tail_length,
+        window=window,
+        ma_short=20,
+        ma_long=50,
+        date=panel.index[-1] + pd.Timedelta(days=1),
+        frequency=frequency,
+        fetcher=synthetic_fetcher(panel),
+        compact=compact
+    )
+
+    def load_full():
+        obj.symbols_data = panel[symbols]
+        obj.benchmark_data = panel[[BENCHMARK]]
+        obj._compact_prices()
+
+    def prepare_plot():
+        load_full()
+        obj.process_rrg_data()
+
+    # (stage, untimed setup, timed call); get_data loads from the first bar so it scales with `years`
+    stages = [
+        ("get_data", None, lambda: obj.get_data(panel.index[0])),
+        ("process_rrg_data", load_full, obj.process_rrg_data),
+        ("process_moving_average_data", load_full, obj.process_moving_average_data),
+        ("create_rrg_plot", prepare_plot, obj.create_rrg_plot),
+    ]
+    results = []
+    for stage, setup, func in stages:
+        if setup is not None:
+            setup()
+        seconds, peak = measure(func, repeat)
+        rows = len(obj.symbols_data) if obj.symbols_data is not None else 0
+        results.append({
+            "stage": stage,
+            "symbols": n_symbols,
+            "years": years,
+            "frequency": frequency,
+            "compact": compact,
+            "rows": rows,
+            "seconds": seconds,
+            "cells_per_second": rows * n_symbols / seconds if seconds else None,
+            "peak_memory_mb": peak / 1024 ** 2,
+            "data_memory_mb": sum(obj.memory_usage().values()) / 1024 ** 2,
+        })
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["stage"], r["symbols"], r["years"], r["frequency"], r.get("compact", False))
+    previous = {key(r): r for r in baseline["results"]}
+    for row in current["results"]:
+        old = previous.get(key(row))
+        if old:
+            print(f"{row['stage']:<28} {row['symbols']:>6} sym {row['years']:>4} y {row['frequency']:<8} "
+                  f"{old['seconds']:.4f}s -> {row['seconds']:.4f}s  x{old['seconds'] / row['seconds']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each RelativeRotationData stage on synthetic price panels.")
+    parser.add_argument("--symbols", nargs="+", type=int, default=[20, 200, 2000])
+    parser.add_argument("--years", nargs="+", type=float, default=[2, 10])
+    parser.add_argument("--frequencies", nargs="+", choices=list(BARS_PER_YEAR), default=["daily", "weekly"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compact", action="store_true", help="run RelativeRotationData in float32 compact mode")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "results": []}
+    for n_symbols, years, frequency in itertools.product(args.symbols, args.years, args.frequencies):
+        for row in run_case(n_symbols, years, frequency, repeat=args.repeat, seed=args.seed, compact=args.compact):
+            report["results"].append(row)
+            print(f"{row['stage']:<28} {n_symbols:>6} sym {years:>4} y {frequency:<8} "
+                  f"{row['seconds']:.4f}s  {row['peak_memory_mb']:.1f} MB peak  {row['data_memory_mb']:.1f} MB held", file=sys.stderr)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
@@ -1,45 +1,199 @@
 import pandas as pd
+import numpy as np
 import os
+import json
+import glob
+import time
+import fcntl
+import shutil
+import argparse
+
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import instrumented, annotate
+
+CLOSE_STORE_DIR = ".close_store"
+MIN_HISTORY_BARS = 252  # Assuming 252 trading days in a year
+EXCLUDED_TICKERS = {'^BUK100P', '^FTSE', '^GDAXI', '^FCHI', '^STOXX50E', '^N100', '^BFX', '^HSI', '^STI'}
 
 class DataReader:
     def __init__(self, paths, combined_file):
         self.source_market_data = paths['source_market_data']
         self.dest_tickers_data = paths['dest_tickers_data']
+        self.close_store = paths.get('close_store') or os.path.join(self.source_market_data, CLOSE_STORE_DIR)
         self.combined_file = combined_file 
     def read_tickers(self):
         return pd.read_csv(self.combined_file)['ticker'].tolist()
 
+    @instrumented("read_stock_data")
     def read_stock_data(self, ticker):
         file_path = os.path.join(self.source_market_data, f"{ticker}.csv")
         #df = pd.read_csv(file_path, header=0, parse_dates=['Date'], index_col='Date', date_parser=lambda x: pd.to_datetime(x.rpartition('-')[0]))
         df = pd.read_csv(file_path, index_col= 'Date', parse_dates=False)
         df.index = df.index.str.split(' ').str[0]
         df.index = pd.to_datetime(df.index)
+        annotate(rows=len(df))
         return df[['Close']]
-    
 
+    def read_close_column(self, ticker):
+        # Build-time parser: only the Date/Close columns, dates cut to YYYY-MM-DD without a Python-level split.
+        file_path = os.path.join(self.source_market_data, f"{ticker}.csv")
+        df = pd.read_csv(file_path, usecols=['Date', 'Close'])
+        try:
+            dates = pd.to_datetime(df['Date'].str.slice(0, 10), format='%Y-%m-%d')
+        except ValueError:
+            dates = pd.to_datetime(df['Date'].str.split(' ').str[0])
+        return pd.Series(df['Close'].to_numpy(dtype=np.float64), index=pd.DatetimeIndex(dates), name=ticker)
 
-    def create_combined_df(self):
-        combined_df = pd.DataFrame()
-        tickers = self.read_tickers()
+    def _source_mtimes(self, tickers):
+        mtimes = {}
         for ticker in tickers:
-            df = self.read_stock_data(ticker)
-            if df['Close'].isnull().any():
-                print(f"Skipping ticker {ticker} due to missing data.")
+            try:
+                mtimes[ticker] = os.path.getmtime(os.path.join(self.source_market_data, f"{ticker}.csv"))
+            except FileNotFoundError:
                 continue
-            if len(df) < 252:  # Assuming 252 trading days in a year
-                print(f"Skipping ticker {ticker} due to insufficient historical data.")
+        return mtimes
+
+    def _read_manifest(self):
+        # Stores written before versioning have no 'version' and are rebuilt.
+        try:
+            with open(os.path.join(self.close_store, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return manifest if 'version' in manifest else None
+
+    def _load_store(self, manifest):
+        path = os.path.join(self.close_store, manifest['version'])
+        dates = np.load(os.path.join(path, "dates.npy"))
+        close = np.load(os.path.join(path, "close.npy"), mmap_mode='r')
+        return dates, close
+
+    def build_close_store(self, tickers=None):
+        # Compile the CSV folder into a dates x tickers Close matrix saved in Fortran
+        # order, so each ticker's column is one contiguous block of the memory map.
+        # Rebuilds are serialised by a file lock; each one writes a new version folder
+        # and swaps manifest.json last, so readers always see matching dates and close.
+        os.makedirs(self.close_store, exist_ok=True)
+        with open(os.path.join(self.close_store, "build.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._build_close_store(tickers)
+
+    def _build_close_store(self, tickers):
+        # Only CSVs that are new or whose mtime changed are parsed; the other columns are
+        # copied from the current version.
+        if tickers is None:
+            tickers = sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(self.source_market_data, "*.csv")))
+        mtimes = self._source_mtimes(tickers)
+        previous = self._read_manifest()
+        reused, skipped = set(), {}
+        if previous is not None:
+            old_position = {t: j for j, t in enumerate(previous['tickers'])}
+            reused = {t for t, m in mtimes.items() if t in old_position and previous['mtimes'].get(t) == m}
+            skipped = {t: m for t, m in previous.get('skipped', {}).items() if mtimes.get(t) == m}
+        columns = {}
+        for ticker in [t for t in mtimes if t not in reused and t not in skipped]:
+            try:
+                close = self.read_close_column(ticker)
+            except ValueError:
+                # Not a price file (e.g. a ticker list kept in the same folder).
+                skipped[ticker] = mtimes[ticker]
                 continue
-            
-            df = df.rename(columns={'Close': ticker})
-            #        # Debugging prints
-            #print(f"Ticker: {ticker}")
-            #print(f"Number of rows: {len(df)}")
-            #print(f"Date range: {df.index.min()} to {df.index.max()}")
-            #print(f"Number of duplicate indices: {df.index.duplicated().sum()}")
-            #print(df.index.duplicated())
-            #print(f"First few rows:\n{df.head()}\n")
-            if ticker != '^BUK100P' and ticker != '^FTSE' and ticker != '^GDAXI' and ticker != '^FCHI' and ticker != '^STOXX50E' and ticker != '^N100' and ticker != '^BFX' and ticker != '^HSI' and ticker != '^STI':
-                combined_df = pd.concat([combined_df, df], axis=1)
-    
-        return combined_df
+            columns[ticker] = close[~close.index.duplicated(keep='last')]
+        tickers = [t for t in mtimes if t in reused or t in columns]
+        if previous is not None and not columns and tickers == previous['tickers'] and skipped == previous.get('skipped', {}):
+            return previous  # rebuilt meanwhile by another session
+
+        indexes = [close.index.values for close in columns.values()]
+        if reused:
+            old_dates, old_close = self._load_store(previous)
+            old_dates = pd.DatetimeIndex(old_dates)
+            indexes.append(old_dates.values)
+        dates = pd.DatetimeIndex(np.unique(np.concatenate(indexes))) if indexes else pd.DatetimeIndex([])
+        matrix = np.full((len(dates), len(tickers)), np.nan, dtype=np.float64, order='F')
+        old_rows = dates.get_indexer(old_dates) if reused else None
+        for j, ticker in enumerate(tickers):
+            if ticker in columns:
+                matrix[dates.get_indexer(columns[ticker].index), j] = columns[ticker].to_numpy()
+            else:
+                matrix[old_rows, j] = old_close[:, old_position[ticker]]
+
+        version = f"v{time.time_ns()}"
+        path = os.path.join(self.close_store, version)
+        os.makedirs(path)
+        np.save(os.path.join(path, "dates.npy"), dates.values.astype('datetime64[D]'))
+        np.save(os.path.join(path, "close.npy"), matrix)
+        manifest = {'version': version, 'tickers': tickers, 'mtimes': {t: mtimes[t] for t in tickers}, 'skipped': skipped}
+        tmp_path = os.path.join(self.close_store, f"manifest.{version}.tmp.json")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.close_store, "manifest.json"))
+
+        # Older versions go; the one just replaced stays for readers that still hold its manifest.
+        keep = {version, previous['version'] if previous is not None else None}
+        for entry in os.listdir(self.close_store):
+            if entry.startswith("v") and entry not in keep and os.path.isdir(os.path.join(self.close_store, entry)):
+                shutil.rmtree(os.path.join(self.close_store, entry), ignore_errors=True)
+        return manifest
+
+    @instrumented("read_close_matrix")
+    def read_close_matrix(self, tickers):
+        # Close prices for `tickers` from the memory-mapped store, rebuilt automatically
+        # when a requested CSV is new or its mtime changed. Tickers without a CSV are omitted,
+        # repeated ones returned once.
+        tickers = list(dict.fromkeys(tickers))
+        manifest = self._read_manifest()
+        mtimes = self._source_mtimes(tickers)
+        if manifest is None or any(manifest['mtimes'].get(t) != m for t, m in mtimes.items()):
+            manifest = self.build_close_store()
+            annotate(cache_misses=1)
+        else:
+            annotate(cache_hits=1)
+        try:
+            dates, close = self._load_store(manifest)
+        except FileNotFoundError:
+            # Version removed by two rebuilds since the manifest was read.
+            manifest = self._read_manifest()
+            dates, close = self._load_store(manifest)
+        position = {t: j for j, t in enumerate(manifest['tickers'])}
+        present = [t for t in tickers if t in position]
+        cols = [position[t] for t in present]
+        if len(cols) == 1:
+            values = close[:, cols[0]][:, None]  # contiguous column view, no copy
+        else:
+            values = close[:, cols]
+        df = pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='Date'), columns=present, copy=False)
+        df = df.dropna(how='all')
+        annotate(rows=len(df))
+        return df
+
+    def _load_for_combined(self, ticker):
+        # Worker for create_combined_df: returns (ticker, Close series or None, skip reason or None).
+        try:
+            df = self.read_stock_data(ticker)
+        except FileNotFoundError:
+            return ticker, None, "missing file"
+        if df['Close'].isnull().any():
+            return ticker, None, "missing data"
+        if len(df) < MIN_HISTORY_BARS:
+            return ticker, None, "insufficient historical data"
+        return ticker, df['Close'].rename(ticker), None
+
+    def create_combined_df(self, max_workers=8):
+        # Reads ticker files concurrently and assembles the frame with a single concat.
+        # Returns (combined_df, skipped) where skipped is a DataFrame of ticker/reason rows.
+        tickers = [t for t in self.read_tickers() if t not in EXCLUDED_TICKERS]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._load_for_combined, tickers))
+        columns = [close for _, close, reason in results if reason is None]
+        skipped = pd.DataFrame([(t, reason) for t, _, reason in results if reason is not None], columns=['ticker', 'reason'])
+        combined_df = pd.concat(columns, axis=1) if columns else pd.DataFrame()
+        return combined_df, skipped
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a folder of ticker CSVs into a memory-mapped Close store.")
+    parser.add_argument("source", help="folder containing <ticker>.csv files")
+    parser.add_argument("--store", default=None, help=f"output folder (default: <source>/{CLOSE_STORE_DIR})")
+    args = parser.parse_args()
+    reader = DataReader({'source_market_data': args.source, 'dest_tickers_data': "", 'close_store': args.store}, combined_file=None)
+    manifest = reader.build_close_store()
+    print(f"Stored {len(manifest['tickers'])} tickers in {reader.close_store}")
@@ -0,0 +1,106 @@
+import time
+
+import logging
+
+import threading
+
+import pandas as pd
+
+import yfinance as yf
+
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def yahoo_download(tickers, start, end, interval):
+    data = yf.download(tickers, start=start, end=end, interval=interval, threads=False, progress=False)
+    if data is not None and not isinstance(data.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single ticker.
+        data = pd.concat({tickers[0]: data}, axis=1).swaplevel(axis=1)
+    return data
+
+
+class RateLimiter:
+    # Spaces request starts at least 1/rate seconds apart across threads.
+    def __init__(self, max_requests_per_second, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / max_requests_per_second if max_requests_per_second else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            self.sleep(start - now)
+
+
+class FetchScheduler:
+    # Splits a ticker list into chunks, downloads them on a bounded thread pool with
+    # retries and a request-rate ceiling, and merges the chunks back into one
+    # yf.download-shaped frame: (field, ticker) MultiIndex columns.
+    # `fetch_fn(tickers, start, end, interval)` can be swapped for a local fake.
+    def __init__(
+        self,
+        fetch_fn=yahoo_download,
+        chunk_size=50,
+        max_workers=4,
+        max_retries=3,
+        backoff=1.0,
+        max_requests_per_second=2.0,
+        sleep=time.sleep
+    ):
+        self.fetch_fn = fetch_fn
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.rate_limiter = RateLimiter(max_requests_per_second, sleep=sleep)
+        self.failed_tickers = []
+        self.attempts = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, tickers, start, end, interval):
+        return self.download(tickers, start, end, interval)
+
+    def _fetch_chunk(self, chunk, start, end, interval):
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            with self._lock:
+                self.attempts += 1
+            try:
+                data = self.fetch_fn(chunk, start, end, interval)
+                if data is not None and not data.empty:
+                    return chunk, data
+                logger.warning("Empty download for %s (attempt %d of %d)", ", ".join(chunk), attempt + 1, self.max_retries + 1)
+            except Exception:
+                logger.warning("Download failed for %s (attempt %d of %d)", ", ".join(chunk), attempt + 1, self.max_retries + 1, exc_info=True)
+            if attempt < self.max_retries:
+                self.sleep(self.backoff * 2 ** attempt)
+        logger.error("Giving up on %s after %d attempts", ", ".join(chunk), self.max_retries + 1)
+        return chunk, None
+
+    def download(self, tickers, start, end, interval="1d"):
+        tickers = list(dict.fromkeys(tickers))
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        self.failed_tickers = []
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(chunks)))) as executor:
+            results = list(executor.map(lambda chunk: self._fetch_chunk(chunk, start, end, interval), chunks))
+
+        frames = []
+        for chunk, data in results:
+            if data is None:
+                self.failed_tickers.extend(chunk)
+            else:
+                frames.append(data)
+        if not frames:
+            return pd.DataFrame(columns=pd.MultiIndex.from_product([["Close", "Volume"], tickers]), dtype=float)
+        data = pd.concat(frames, axis=1).sort_index()
+        fields = list(dict.fromkeys(data.columns.get_level_values(0)))
+        # Failed tickers come back as all-NaN columns, like yf.download does for unknown symbols.
+        return data.reindex(columns=pd.MultiIndex.from_product([fields, tickers], names=data.columns.names))
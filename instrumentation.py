@@ -0,0 +1,116 @@
+import time
+
+import functools
+
+import threading
+
+import pandas as pd
+
+from contextlib import contextmanager
+
+
+class StageRecorder:
+    # Collects one record per instrumented call: stage name, wall time, rows and cache counters.
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _open_stages(self):
+        if not hasattr(self._local, "open"):
+            self._local.open = []
+        return self._local.open
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    @contextmanager
+    def stage(self, name):
+        record = {"stage": name, "seconds": 0.0, "rows": None, "cache_hits": 0, "cache_misses": 0}
+        open_stages = self._open_stages()
+        open_stages.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            open_stages.pop()
+            with self._lock:
+                self.records.append(record)
+
+    def annotate(self, **values):
+        # Attach rows / cache counters to the innermost stage that is still running.
+        open_stages = self._open_stages()
+        if open_stages:
+            open_stages[-1].update(values)
+
+    def to_frame(self):
+        with self._lock:
+            records = list(self.records)
+        return pd.DataFrame(records, columns=["stage", "seconds", "rows", "cache_hits", "cache_misses"])
+
+    def summary(self):
+        frame = self.to_frame()
+        if frame.empty:
+            return frame
+        return frame.groupby("stage", sort=False).agg(
+            calls=("seconds", "size"), seconds=("seconds", "sum"), rows=("rows", "sum"),
+            cache_hits=("cache_hits", "sum"), cache_misses=("cache_misses", "sum")
+        ).reset_index()
+
+
+_local = threading.local()
+
+
+def current_recorder():
+    # Each thread (a Streamlit session runs its script in its own thread) gets its own recorder.
+    if not hasattr(_local, "recorder"):
+        _local.recorder = StageRecorder()
+    return _local.recorder
+
+
+@contextmanager
+def use_recorder(recorder):
+    # Route records from this thread (e.g. a pool worker) into another thread's recorder.
+    previous = getattr(_local, "recorder", None)
+    _local.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        if previous is None:
+            del _local.recorder
+        else:
+            _local.recorder = previous
+
+
+def submit(executor, func, *args, **kwargs):
+    # executor.submit() that records the worker's stages into the submitting thread's recorder.
+    recorder = current_recorder()
+
+    def run():
+        with use_recorder(recorder):
+            return func(*args, **kwargs)
+    return executor.submit(run)
+
+
+def annotate(**values):
+    current_recorder().annotate(**values)
+
+
+def instrumented(stage):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with current_recorder().stage(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_stage_timings():
+    return current_recorder().summary()
+
+
+def reset_stage_timings():
+    current_recorder().reset()
@@ -1,10 +1,42 @@
+import os
 import streamlit as st
-from datetime import date
-from relative_rotation import RelativeRotationData, SPDRS
+from concurrent.futures import as_completed
+from datetime import date, timedelta
+import pandas as pd
+from relative_rotation import RelativeRotationData, SPDRS, HIGH_CARDINALITY_THRESHOLD
+from price_cache import PriceCache
+from result_cache import SharedCache
+from screener import screen_rotation, screen_universe
+from instrumentation import reset_stage_timings, get_stage_timings
+
+# Charts above HIGH_CARDINALITY_THRESHOLD symbols use the packed Scattergl rendering.
+MAX_TICKERS = 500
+# Every benchmark is loaded up front, so switching benchmark needs no new download.
+BENCHMARKS = ["SPY", "QQQ", "DIA", 'GLD', 'COPX']
+# Every window on the sliders is swept against every benchmark at once, so moving a window
+# slider or switching benchmark is a lookup.
+DAILY_WINDOWS = range(10, 51)
+WEEKLY_WINDOWS = range(5, 21)
+# Every short/long MA length on the sliders, computed in one pass for the moving-average view.
+MA_WINDOWS = sorted(set(range(5, 56, 5)) | set(range(20, 206, 5)))
+PRICE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".rrg_cache", "prices.sqlite")
+# Loaded prices and RRG results shared read-only by every session of this server process.
+SHARED_CACHE_TTL = 15 * 60
+SHARED_CACHE_BYTES = 1024 ** 3
+
+@st.cache_resource
+def get_price_cache():
+    return PriceCache(PRICE_CACHE_PATH)
+
+@st.cache_resource
+def get_shared_cache():
+    return SharedCache(max_items=256, max_bytes=SHARED_CACHE_BYTES, ttl=SHARED_CACHE_TTL)
 
 def main():
     st.set_page_config(page_title="RRG Dashboard", layout="wide")
+    reset_stage_timings()
     st.sidebar.title("RRG Parameters")
+    show_performance = st.sidebar.checkbox("Show performance panel", value=False)
 
     # Data Source & Calculation Method
     data_source = st.sidebar.selectbox(
@@ -15,46 +47,66 @@ def main():
 
     calculation_method = st.sidebar.selectbox(
         "Select Calculation Method",
-        ["RRG: Momentum", "RRG: Moving Averages"],
+        ["RRG: Momentum", "RRG: Z-Score (JdK)", "RRG: Moving Averages"],
         index=0
     )
 
     # Benchmark Selection
     benchmark = st.sidebar.selectbox(
-        "Select Benchmark", ["SPY", "QQQ", "DIA", 'GLD', 'COPX'], index=0
+        "Select Benchmark", BENCHMARKS, index=0
     )
 
+    is_rrg = calculation_method != "RRG: Moving Averages"
+    ma_relative = False
+    rrg_method = "zscore" if calculation_method == "RRG: Z-Score (JdK)" else "tradingview"
+
     # Parameter Controls
-    if calculation_method == "RRG: Momentum":
+    if is_rrg:
         st.sidebar.header("Daily Parameters")
-        window = st.sidebar.slider("Window Size - 1d", 10, 50, 20, 1)
+        window = st.sidebar.slider("Window Size - 1d", DAILY_WINDOWS[0], DAILY_WINDOWS[-1], 20, 1)
         tail_length = st.sidebar.slider("Tail Length - 1d", 1, 12, 5, 1)
         st.sidebar.header("Weekly Parameters")
-        window_1wk = st.sidebar.slider("Window Size - 1wk", 5, 20, 1, 1)
+        window_1wk = st.sidebar.slider("Window Size - 1wk", WEEKLY_WINDOWS[0], WEEKLY_WINDOWS[-1], 10, 1)
         tail_length_1wk = st.sidebar.slider("Tail Length - 1wk", 1, 20, 5, 1)
     else:
         ma_short = st.sidebar.slider("Short MA", 5, 55, 20, 5)
         ma_long = st.sidebar.slider("Long MA", 20, 205, 50, 5)
         tail_length = st.sidebar.slider("Tail Length", 1, 30, 6, 1)
-        benchmark = None # Not used for MA method
+        ma_relative = st.sidebar.checkbox("Measure against benchmark", value=False,
+                                          help="Distances from the MAs of price / benchmark instead of price.")
+        if not ma_relative:
+            benchmark = None # Not used for MA method
+
+    snapshot_dir = st.sidebar.text_input(
+        "Precomputed snapshot folder (optional)",
+        help="Folder written by precompute.py; matching snapshots are loaded instead of computed."
+    ).strip() or None
+    compact = st.sidebar.checkbox(
+        "Compact float32 prices",
+        value=False,
+        help="Halves price and RRG memory for large universes; values stay within 1e-4 of the float64 result."
+    )
 
     st.title("Relative Rotation Graph Dashboard")
 
-    stocks = st.text_input(
-        "Enter stocks (up to 20, comma-separated):",
+    stocks = st.text_area(
+        f"Enter stocks (up to {MAX_TICKERS}, comma-separated):",
         placeholder="e.g., XLB, XLC, XLE",
-        max_chars=1000
+        max_chars=8 * MAX_TICKERS
     )
 
     if stocks:
-        stock_list = [s.strip() for s in stocks.split(",") if s.strip()]
-        if len(stock_list) > 20:
-            st.error("Maximum 20 stocks allowed")
+        stock_list = list(dict.fromkeys(s.strip() for s in stocks.split(",") if s.strip()))
+        if len(stock_list) > MAX_TICKERS:
+            st.error(f"Maximum {MAX_TICKERS} stocks allowed")
             return
 
-        st.write(f"**Selected Stocks:** {', '.join(stock_list)}")
+        if len(stock_list) <= HIGH_CARDINALITY_THRESHOLD:
+            st.write(f"**Selected Stocks:** {', '.join(stock_list)}")
+        else:
+            st.write(f"**Selected Stocks:** {len(stock_list)} tickers")
         st.write(f"**Method:** {calculation_method}")
-        if calculation_method == "RRG: Momentum":
+        if is_rrg:
             st.write(f"**Benchmark:** {benchmark}")
             st.write(f"**Window:** {window}, **Tail Length:** {tail_length}")
         else:
@@ -62,64 +114,99 @@ def main():
             
 
         target_date = date.today()
-        chart_type = "rrg" if calculation_method == "RRG: Momentum" else "moving_average"
+        chart_type = "rrg" if is_rrg else "moving_average"
+
+        # The chart date range, together with the method's warm-up, decides how much history is loaded
+        st.sidebar.header("Chart Date Range")
+        start_range = st.sidebar.date_input("From", max_value=target_date, value=target_date - timedelta(days=365))
+        end_range = st.sidebar.date_input("To", max_value=target_date, value=target_date)
+        if start_range > end_range:
+            st.sidebar.error("Start date must be before end date.")
+            return
         local_folder_path = "/home/imagda/_invest2024/python/downloadData_v1/data/market_data"
+        price_cache = get_price_cache() if data_source == "Yahoo Finance" else None
+        result_cache = get_shared_cache()
 
         # Create RRG objects
         rrg_obj_daily_1 = RelativeRotationData(
             symbols=stock_list,
-            benchmark=benchmark if calculation_method == "RRG: Momentum" else "N/A",
+            benchmark=benchmark,
             study="price",
-            date=target_date,
-            window=window if calculation_method == "RRG: Momentum" else None,
+            date=end_range,
+            start_date=start_range,
+            window=window if is_rrg else None,
             ma_short=ma_short if calculation_method == "RRG: Moving Averages" else None,
             ma_long=ma_long if calculation_method == "RRG: Moving Averages" else None,
             tail_length=tail_length,
             chart_type=chart_type,
             data_source=data_source,
             local_data_path=(local_folder_path if data_source == "Local Folder" else None),
-            frequency="daily"
+            frequency="daily",
+            price_cache=price_cache,
+            result_cache=result_cache,
+            snapshot_dir=snapshot_dir,
+            benchmarks=BENCHMARKS if is_rrg else None,
+            rrg_method=rrg_method,
+            compact=compact,
+            ma_relative=ma_relative
         )
 
         rrg_obj_weekly = RelativeRotationData(
             symbols=stock_list,
-            benchmark=benchmark if calculation_method == "RRG: Momentum" else "N/A",
+            benchmark=benchmark,
             study="price",
-            date=target_date,
-            window=window_1wk if calculation_method == "RRG: Momentum" else None,
+            date=end_range,
+            start_date=start_range,
+            window=window_1wk if is_rrg else None,
             ma_short=ma_short if calculation_method == "RRG: Moving Averages" else None,
             ma_long=ma_long if calculation_method == "RRG: Moving Averages" else None,
-            tail_length=tail_length_1wk if calculation_method == "RRG: Momentum" else tail_length,
+            tail_length=tail_length_1wk if is_rrg else tail_length,
             chart_type=chart_type,
             data_source=data_source,
             local_data_path=(local_folder_path if data_source == "Local Folder" else None),
-            frequency="weekly"
+            frequency="weekly",
+            price_cache=price_cache,
+            result_cache=result_cache,
+            snapshot_dir=snapshot_dir,
+            benchmarks=BENCHMARKS if is_rrg else None,
+            rrg_method=rrg_method,
+            compact=compact,
+            ma_relative=ma_relative
         )
 
-        # Load full data (do not filter yet)
-        rrg_obj_daily_1.get_data()
-        rrg_obj_weekly.get_data()
-
-        # Sidebar date range controls (after loading data)
-        full_index = rrg_obj_daily_1.symbols_data.index
-        min_date = full_index.min().date()
-        max_date = full_index.max().date()
-        st.sidebar.header("Chart Date Range")
-        start_range = st.sidebar.date_input("From", min_value=min_date, max_value=max_date, value=min_date)
-        end_range = st.sidebar.date_input("To", min_value=min_date, max_value=max_date, value=max_date)
-        if start_range > end_range:
-            st.sidebar.error("Start date must be before end date.")
-            return
-
-        # Filter both objects to range
-        for obj in [rrg_obj_daily_1, rrg_obj_weekly]:
-            obj.symbols_data = obj.symbols_data.loc[start_range:end_range]
-            obj.benchmark_data = obj.benchmark_data.loc[start_range:end_range]
+        # Load the range plus warm-up; weekly bars are resampled from the daily prices, so the
+        # daily load also covers the weekly warm-up. Sweeps are sized for their longest window.
+        sweep = chart_type == "rrg" and rrg_method == "tradingview" and not snapshot_dir
+        if chart_type == "moving_average":
+            warmup_windows = {"daily": MA_WINDOWS[-1], "weekly": MA_WINDOWS[-1]}
+        elif sweep:
+            warmup_windows = {"daily": DAILY_WINDOWS[-1], "weekly": WEEKLY_WINDOWS[-1]}
+        else:
+            warmup_windows = {}
+        fetch_from = min(obj.fetch_start(warmup_windows.get(obj.frequency)) for obj in [rrg_obj_daily_1, rrg_obj_weekly])
+        with st.spinner("Loading prices..."):
+            rrg_obj_daily_1.get_data_async(fetch_from).result()
+        rrg_obj_weekly.resample_from(rrg_obj_daily_1)
+        if rrg_obj_daily_1.failed_tickers:
+            st.warning(
+                f"No prices for {', '.join(rrg_obj_daily_1.failed_tickers)}: the download failed or the symbol is "
+                "unknown, so they are left out of the charts. Download errors are in the server log."
+            )
+        if price_cache is not None:
+            cache_stats = price_cache.stats()
+            st.sidebar.caption(f"Price cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        shared_stats = result_cache.stats()
+        st.sidebar.caption(
+            f"Shared cache: {shared_stats['items']} items, {shared_stats['bytes'] / 1024 ** 2:.0f} MB, "
+            f"{shared_stats['hits']} hits / {shared_stats['misses']} misses"
+        )
 
-        # Find common available date range for the time slider
+        # Dates in the chart range present in both frequencies drive the time slider; the
+        # warm-up bars before it stay loaded so every tail in the range is complete.
         dates_daily = rrg_obj_daily_1.symbols_data.index
         dates_weekly = rrg_obj_weekly.symbols_data.index
         common_index = dates_daily.intersection(dates_weekly)
+        common_index = common_index[(common_index >= pd.Timestamp(start_range)) & (common_index <= pd.Timestamp(end_range))]
         if len(common_index) == 0:
             st.error("No overlapping dates in daily and weekly data! Check your symbols or source.")
             return
@@ -139,32 +226,74 @@ def main():
             default=stock_list
         )
 
-        default_date = common_index[-1]
-        selected_date = st.slider(
-            "📅 Select Date (affects both charts):",
-            min_value=common_index[0].date(),
-            max_value=common_index[-1].date(),
-            value=default_date.date(),
-            format="YYYY-MM-DD"
+        playback = chart_type == "rrg" and st.checkbox(
+            "▶ Playback mode",
+            value=False,
+            help="Animate the whole date range in the browser instead of re-running on every slider move."
         )
-        # Filter up to the selected date
-        for obj in [rrg_obj_daily_1, rrg_obj_weekly]:
-            obj.symbols_data = obj.symbols_data.loc[:selected_date]
-            obj.benchmark_data = obj.benchmark_data.loc[:selected_date]
-            
-        rrg_obj_daily_1.symbols = selected_symbols
-        rrg_obj_daily_1.process_rotation_data()
-        fig_daily_filtered = rrg_obj_daily_1.create_rrg_plot()
-
-        rrg_obj_weekly.symbols = selected_symbols
-        rrg_obj_weekly.process_rotation_data()
-        fig_weekly_filtered = rrg_obj_weekly.create_rrg_plot()
+        sweep_windows = {"daily": DAILY_WINDOWS, "weekly": WEEKLY_WINDOWS}
+        if playback:
+            for title, obj, key in [("Daily RRG Playback", rrg_obj_daily_1, "daily_rrg_playback"),
+                                    ("Weekly RRG Playback", rrg_obj_weekly, "weekly_rrg_playback")]:
+                if sweep:
+                    obj.process_window_sweep(sweep_windows[obj.frequency])
+                    obj.select_window(obj.window)
+                obj.symbols = selected_symbols
+                st.subheader(title)
+                st.plotly_chart(obj.create_rrg_animation(common_index[0], common_index[-1]), use_container_width=True, key=key)
+        else:
+            default_date = common_index[-1]
+            selected_date = st.slider(
+                "📅 Select Date (affects both charts):",
+                min_value=common_index[0].date(),
+                max_value=common_index[-1].date(),
+                value=default_date.date(),
+                format="YYYY-MM-DD"
+            )
+            # Indicators are computed once over the full range (cached) and sliced at the selected date.
+            # Daily and weekly are built concurrently; each chart is drawn as soon as it is ready.
+            st.subheader("Daily RRG Chart")
+            daily_slot = st.empty()
+            st.subheader("Weekly RRG Chart")
+            weekly_slot = st.empty()
+            futures = {
+                rrg_obj_daily_1.rotation_plot_async(
+                    selected_date, selected_symbols, sweep_windows=sweep_windows["daily"] if sweep else None,
+                    ma_windows=MA_WINDOWS if chart_type == "moving_average" else None
+                ): (daily_slot, "daily_rrg_chart_1"),
+                rrg_obj_weekly.rotation_plot_async(
+                    selected_date, selected_symbols, sweep_windows=sweep_windows["weekly"] if sweep else None,
+                    ma_windows=MA_WINDOWS if chart_type == "moving_average" else None
+                ): (weekly_slot, "weekly_rrg_chart"),
+            }
+            for slot, _ in futures.values():
+                slot.info("Computing...")
+            for future in as_completed(futures):
+                slot, key = futures[future]
+                slot.plotly_chart(future.result(), use_container_width=True, key=key)
 
-        st.subheader("Daily RRG Chart")
-        st.plotly_chart(fig_daily_filtered, use_container_width=True, key="daily_rrg_chart_1")
+        if show_performance:
+            with st.expander("Performance (this rerun)", expanded=True):
+                st.dataframe(get_stage_timings(), use_container_width=True)
+                usage = {name: obj.memory_usage() for name, obj in [("daily", rrg_obj_daily_1), ("weekly", rrg_obj_weekly)]}
+                st.caption("Memory (MB): " + ", ".join(
+                    f"{name} {sum(parts.values()) / 1024 ** 2:.1f}" for name, parts in usage.items()
+                ))
 
-        st.subheader("Weekly RRG Chart")
-        st.plotly_chart(fig_weekly_filtered, use_container_width=True, key="weekly_rrg_chart")
+        if chart_type == "rrg":
+            with st.expander("RRG Screener"):
+                st.caption("Latest point per ticker, ranked by quadrant, distance from (100, 100), heading and speed.")
+                st.write("Daily")
+                st.dataframe(screen_rotation(rrg_obj_daily_1), use_container_width=True)
+                st.write("Weekly")
+                st.dataframe(screen_rotation(rrg_obj_weekly), use_container_width=True)
+                if data_source == "Local Folder":
+                    tickers_file = st.text_input("Universe ticker file (CSV with a 'ticker' column)")
+                    if tickers_file and st.button("Screen full universe"):
+                        st.dataframe(
+                            screen_universe(local_folder_path, tickers_file, benchmark, window=window),
+                            use_container_width=True
+                        )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+import os
+
+import json
+
+import argparse
+
+import itertools
+
+from datetime import datetime, timedelta
+
+from concurrent.futures import ProcessPoolExecutor
+
+from data_reader import DataReader
+
+from price_cache import PriceCache
+
+from fetch_scheduler import FetchScheduler
+
+from relative_rotation import resample_prices
+
+from rrg_engine import calculate_rrg_batch
+
+from snapshots import save_snapshot, snapshot_path
+
+BENCHMARKS = ["SPY", "QQQ", "DIA", "GLD", "COPX"]
+
+_PRICES = None
+_SYMBOLS = None
+
+
+def _init_worker(prices, symbols):
+    global _PRICES, _SYMBOLS
+    _PRICES = prices
+    _SYMBOLS = symbols
+
+
+def _compute_combination(job):
+    # Runs in a worker process against the daily prices handed over once by the initializer.
+    benchmark, frequency, window, out_dir, source = job
+    prices = resample_prices(_PRICES, frequency)
+    symbols = [t for t in _SYMBOLS if t != benchmark]
+    result = calculate_rrg_batch(prices[symbols], prices[benchmark], window=window)
+    return save_snapshot(result, snapshot_path(out_dir, benchmark, frequency, window), source, as_of=_PRICES.index.max())
+
+
+def load_universe_prices(tickers, benchmarks, source, local_data_path=None, days=1500, cache_path=None):
+    tickers = list(dict.fromkeys(list(tickers) + list(benchmarks)))
+    if source == "local":
+        reader = DataReader({'source_market_data': local_data_path, 'dest_tickers_data': ""}, combined_file=None)
+        return reader.read_close_matrix(tickers)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days)
+    # `end` is exclusive for both; include today's bar as the dashboard does.
+    fetch_end = end_date + timedelta(days=1)
+    if cache_path:
+        return PriceCache(cache_path).get(tickers, start_date, fetch_end, interval="1d")
+    return FetchScheduler().download(tickers, start_date, fetch_end, "1d")["Close"]
+
+
+def precompute(tickers, benchmarks, windows, frequencies, out_dir, prices, source, max_workers=None):
+    # `source` ("local" or "yahoo") is recorded so the dashboard only uses snapshots of its own source.
+    os.makedirs(out_dir, exist_ok=True)
+    benchmarks = [b for b in benchmarks if b in prices.columns]
+    symbols = [t for t in dict.fromkeys(tickers) if t in prices.columns]
+    jobs = [(b, f, w, out_dir, source) for b, f, w in itertools.product(benchmarks, frequencies, windows)]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(prices, symbols)) as executor:
+        paths = list(executor.map(_compute_combination, jobs))
+    manifest = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'last_date': str(prices.index.max().date()) if len(prices) else None,
+        'source': source,
+        'study': "price",
+        'symbols': symbols,
+        'snapshots': [
+            {'benchmark': b, 'frequency': f, 'window': w, 'file': os.path.basename(p)}
+            for (b, f, w, _, _), p in zip(jobs, paths)
+        ]
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute RRG snapshots for every benchmark/window/frequency combination.")
+    parser.add_argument("universe", help="CSV with a 'ticker' column listing the symbols")
+    parser.add_argument("--out", required=True, help="snapshot folder the dashboard reads from")
+    parser.add_argument("--benchmarks", nargs="+", default=BENCHMARKS)
+    parser.add_argument("--windows", nargs="+", type=int, default=[20])
+    parser.add_argument("--frequencies", nargs="+", choices=["daily", "weekly", "monthly"], default=["daily", "weekly"])
+    parser.add_argument("--source", choices=["local", "yahoo"], default="local")
+    parser.add_argument("--local-path", default=None, help="folder of <ticker>.csv files for --source local")
+    parser.add_argument("--days", type=int, default=1500, help="calendar days of history for --source yahoo")
+    parser.add_argument("--cache", default=None, help="PriceCache SQLite file for --source yahoo")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    if args.source == "local" and not args.local_path:
+        parser.error("--local-path is required with --source local")
+
+    tickers = DataReader({'source_market_data': "", 'dest_tickers_data': ""}, combined_file=args.universe).read_tickers()
+    prices = load_universe_prices(tickers, args.benchmarks, args.source, args.local_path, args.days, args.cache)
+    manifest = precompute(tickers, args.benchmarks, args.windows, args.frequencies, args.out, prices, args.source, args.workers)
+    print(f"Wrote {len(manifest['snapshots'])} snapshots for {len(manifest['symbols'])} symbols to {args.out}")
@@ -0,0 +1,202 @@
+import os
+
+import time
+
+import sqlite3
+
+from contextlib import contextmanager
+
+import pandas as pd
+
+from fetch_scheduler import FetchScheduler
+
+
+class PriceCache:
+    # Persistent SQLite store of Close/Volume bars per ticker and interval.
+    # `fetcher(tickers, start, end, interval)` must return a frame shaped like
+    # yf.download: (field, ticker) MultiIndex columns and a date index.
+    # Defaults to a FetchScheduler over yfinance.
+    # A ticker that comes back without rows (unknown, delisted, no new bars yet) is
+    # remembered as empty over the fetched range, so reruns don't fetch it again on its own:
+    # for `empty_ttl` seconds when the same fetch returned rows for other tickers, and for
+    # `failed_ttl` seconds when it returned nothing at all (possibly a network failure).
+    FIELDS = {"Close": "close", "Volume": "volume"}
+
+    def __init__(self, path, fetcher=None, empty_ttl=60 * 60, failed_ttl=5 * 60, clock=time.time):
+        self.path = path
+        self.fetcher = fetcher if fetcher is not None else FetchScheduler()
+        self.empty_ttl = empty_ttl
+        self.failed_ttl = failed_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                "ticker TEXT, interval TEXT, date TEXT, close REAL, volume REAL, "
+                "PRIMARY KEY (ticker, interval, date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT, interval TEXT, start TEXT, end TEXT, "
+                "PRIMARY KEY (ticker, interval))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS empty_ranges ("
+                "ticker TEXT, interval TEXT, start TEXT, end TEXT, expires REAL, "
+                "PRIMARY KEY (ticker, interval))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get(self, tickers, start, end, interval="1d", field="Close"):
+        if field not in self.FIELDS:
+            raise ValueError(f"Unsupported field '{field}', expected one of {list(self.FIELDS)}.")
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        tickers = list(dict.fromkeys(tickers))
+
+        with self._connect() as conn:
+            coverage = self._read_coverage(conn, tickers, interval)
+            last_bars = self._read_last_bars(conn, tickers, interval)
+            empty = self._read_empty_ranges(conn, tickers, interval)
+
+        # Group tickers by the missing range so each range is one fetcher call.
+        missing = {}
+        for ticker in tickers:
+            ranges = self._missing_ranges(coverage.get(ticker), last_bars.get(ticker), start, end)
+            if ticker in empty:
+                empty_start, empty_end = empty[ticker]
+                ranges = [(lo, hi) for lo, hi in ranges if not (empty_start <= lo and hi <= empty_end)]
+            if ranges:
+                self.misses += 1
+                for fetch_range in ranges:
+                    missing.setdefault(fetch_range, []).append(ticker)
+            else:
+                self.hits += 1
+
+        for (fetch_start, fetch_end), group in missing.items():
+            data = self.fetcher(group, fetch_start, fetch_end, interval)
+            self._store(data, group, interval, fetch_start, fetch_end)
+
+        return self._read(tickers, start, end, interval, self.FIELDS[field])
+
+    @staticmethod
+    def _missing_ranges(covered, last_bar, start, end):
+        if covered is None:
+            return [(start, end)]
+        covered_start, covered_end = covered
+        ranges = []
+        if start < covered_start:
+            ranges.append((start, covered_start))
+        if end > covered_end:
+            # Re-fetch from the last cached bar so a bar stored while still forming gets refreshed.
+            top_up_start = min(covered_end, last_bar) if last_bar is not None else covered_end
+            ranges.append((top_up_start, end))
+        return ranges
+
+    def _read_coverage(self, conn, tickers, interval):
+        rows = conn.execute(
+            f"SELECT ticker, start, end FROM coverage WHERE interval = ? AND ticker IN ({','.join('?' * len(tickers))})",
+            [interval, *tickers]
+        ).fetchall()
+        return {ticker: (pd.Timestamp(start), pd.Timestamp(end)) for ticker, start, end in rows}
+
+    def _read_empty_ranges(self, conn, tickers, interval):
+        rows = conn.execute(
+            f"SELECT ticker, start, end FROM empty_ranges WHERE interval = ? AND expires > ? AND ticker IN ({','.join('?' * len(tickers))})",
+            [interval, self.clock(), *tickers]
+        ).fetchall()
+        return {ticker: (pd.Timestamp(start), pd.Timestamp(end)) for ticker, start, end in rows}
+
+    def _read_last_bars(self, conn, tickers, interval):
+        rows = conn.execute(
+            f"SELECT ticker, MAX(date) FROM bars WHERE interval = ? AND ticker IN ({','.join('?' * len(tickers))}) GROUP BY ticker",
+            [interval, *tickers]
+        ).fetchall()
+        return {ticker: pd.Timestamp(last) for ticker, last in rows if last is not None}
+
+    def _store(self, data, tickers, interval, fetch_start, fetch_end):
+        if data is None or data.empty:
+            with self._connect() as conn:
+                for ticker in tickers:
+                    self._store_empty(conn, ticker, interval, fetch_start, fetch_end, self.failed_ttl)
+            return
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        dates = index.normalize().strftime("%Y-%m-%d")
+        available = set(data.columns.get_level_values(1))
+
+        with self._connect() as conn:
+            for ticker in tickers:
+                if ticker not in available or ("Close", ticker) not in data.columns:
+                    self._store_empty(conn, ticker, interval, fetch_start, fetch_end, self.empty_ttl)
+                    continue
+                close = data[("Close", ticker)].to_numpy(dtype=float)
+                if ("Volume", ticker) in data.columns:
+                    volume = data[("Volume", ticker)].to_numpy(dtype=float)
+                else:
+                    volume = [None] * len(close)
+                rows = [
+                    (ticker, interval, day, float(c), None if v is None or pd.isna(v) else float(v))
+                    for day, c, v in zip(dates, close, volume) if not pd.isna(c)
+                ]
+                if not rows:
+                    self._store_empty(conn, ticker, interval, fetch_start, fetch_end, self.empty_ttl)
+                    continue
+                conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?)", rows)
+                covered = conn.execute(
+                    "SELECT start, end FROM coverage WHERE ticker = ? AND interval = ?", (ticker, interval)
+                ).fetchone()
+                new_start, new_end = fetch_start, fetch_end
+                if covered:
+                    new_start = min(new_start, pd.Timestamp(covered[0]))
+                    new_end = max(new_end, pd.Timestamp(covered[1]))
+                conn.execute(
+                    "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+                    (ticker, interval, new_start.strftime("%Y-%m-%d"), new_end.strftime("%Y-%m-%d"))
+                )
+
+    def _store_empty(self, conn, ticker, interval, fetch_start, fetch_end, ttl):
+        # Widen an overlapping unexpired empty range instead of replacing it, so the history
+        # fetch and a later top-up don't evict each other's entry.
+        current = conn.execute(
+            "SELECT start, end FROM empty_ranges WHERE ticker = ? AND interval = ? AND expires > ?",
+            (ticker, interval, self.clock())
+        ).fetchone()
+        if current and pd.Timestamp(current[0]) <= fetch_end and fetch_start <= pd.Timestamp(current[1]):
+            fetch_start = min(fetch_start, pd.Timestamp(current[0]))
+            fetch_end = max(fetch_end, pd.Timestamp(current[1]))
+        conn.execute(
+            "INSERT OR REPLACE INTO empty_ranges VALUES (?, ?, ?, ?, ?)",
+            (ticker, interval, fetch_start.strftime("%Y-%m-%d"), fetch_end.strftime("%Y-%m-%d"), self.clock() + ttl)
+        )
+
+    def _read(self, tickers, start, end, interval, column):
+        with self._connect() as conn:
+            frame = pd.read_sql_query(
+                f"SELECT date, ticker, {column} AS value FROM bars "
+                f"WHERE interval = ? AND date >= ? AND date < ? AND ticker IN ({','.join('?' * len(tickers))})",
+                conn,
+                params=[interval, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), *tickers]
+            )
+        if frame.empty:
+            return pd.DataFrame(columns=tickers, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+        wide = frame.pivot(index="date", columns="ticker", values="value")
+        wide.index = pd.DatetimeIndex(pd.to_datetime(wide.index), name="Date")
+        wide.columns.name = None
+        return wide.reindex(columns=tickers).sort_index()
@@ -1,5 +1,3 @@
-import yfinance as yf
-
 import pandas as pd
 
 import numpy as np
@@ -16,11 +14,60 @@ from itertools import cycle
 
 from data_reader import DataReader
 
+from price_cache import PriceCache
+
+from fetch_scheduler import FetchScheduler
+
+from snapshots import DATA_SOURCES, load_snapshot
+
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import instrumented, annotate, submit
+
+from result_cache import LRUCache, frame_fingerprint
+
+from rrg_engine import PriceMatrix, wma_frame, calculate_rrg_batch, calculate_rrg_batch_zscore, calculate_rrg_multi_benchmark, calculate_rrg_multi_benchmark_sweep, calculate_ma_sweep, IncrementalRRG
+
 SPDRS = [
     "XLB", "XLC", "XLE", "XLF", "XLI", "XLK", "XLP",
     "XHB", "XLU", "XLV", "XLY", "XLRE"
 ]
 
+# Above this many symbols create_rrg_plot switches to the packed Scattergl rendering.
+HIGH_CARDINALITY_THRESHOLD = 30
+
+INTERVALS = {"daily": "1d", "weekly": "1wk", "monthly": "1mo"}
+
+# Bars shown when no start date is given (the old fixed 450-day fetch showed about a year of daily bars).
+DEFAULT_RANGE_BARS = {"daily": 252, "weekly": 52, "monthly": 24}
+
+# Calendar days per bar, padded by 5% (exchange holidays) plus one week so a fetch sized
+# from a bar count is never a few bars short.
+CALENDAR_DAYS_PER_BAR = {"daily": 7 / 5, "weekly": 7, "monthly": 31}
+
+
+def bars_to_days(bars, frequency):
+    return int(np.ceil(bars * CALENDAR_DAYS_PER_BAR[frequency] * 1.05)) + 7
+
+
+# Largest benchmark x window sweep (both metrics) kept per object; bigger universes sweep
+# the windows against the selected benchmark only.
+SWEEP_MAX_BYTES = 256 * 1024 ** 2
+
+# Default pool for the *_async methods; numpy and the price downloads release the GIL,
+# so loads and indicator passes for different objects overlap.
+ASYNC_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rrg")
+
+# Yahoo labels weekly bars with the Monday starting the week and monthly bars
+# with the first day of the month; the bar's close is the last close inside it.
+RESAMPLE_RULES = {"weekly": dict(rule="W-MON", label="left", closed="left"), "monthly": dict(rule="MS")}
+
+def resample_prices(data, frequency):
+    if frequency == "daily" or data is None:
+        return data
+    resampled = data.resample(**RESAMPLE_RULES[frequency]).last()
+    return resampled.dropna(how="all")
+
 class RelativeRotationData:
     def __init__(
         self,
@@ -35,10 +82,22 @@ class RelativeRotationData:
         chart_type: Literal["rrg", "moving_average"] = "rrg",
         data_source: Literal["Yahoo Finance", "Local Folder"] = "Yahoo Finance",
         local_data_path: Optional[str] = None,
-        frequency: Literal["daily", "weekly"] = "daily"
+        frequency: Literal["daily", "weekly", "monthly"] = "daily",
+        price_cache: Optional[PriceCache] = None,
+        result_cache: Optional[LRUCache] = None,
+        fetcher: Optional[FetchScheduler] = None,
+        snapshot_dir: Optional[str] = None,
+        benchmarks: Optional[List[str]] = None,
+        rrg_method: Literal["tradingview", "zscore"] = "tradingview",
+        compact: bool = False,
+        ma_relative: bool = False,
+        start_date: Optional[dateType] = None
     ):
         self.symbols = symbols
         self.benchmark = benchmark
+        self.benchmarks = benchmarks
+        self.rrg_method = rrg_method
+        self.compact = compact
         self.study = study
         self.date = date
         self.window = window
@@ -48,15 +107,28 @@ class RelativeRotationData:
         self.local_data_path = local_data_path
         self.ma_short = ma_short
         self.ma_long = ma_long
+        self.ma_relative = ma_relative
         self.frequency = frequency
-        self.start_date = None
+        self.price_cache = price_cache
+        self.result_cache = result_cache
+        self.fetcher = fetcher if fetcher is not None else FetchScheduler()
+        self.snapshot_dir = snapshot_dir
+        self.start_date = start_date
         self.end_date = None
         self.symbols_data = None
         self.benchmark_data = None
+        self.failed_tickers = []
+        self.rrg_result = None
+        self.rrg_data_full = None
+        self.rrg_result_full = None
+        self._full_rotation_key = None
+        self.rrg_cube = None
+        self.rrg_sweep = None
+        self.ma_sweep = None
+        self.price_matrix = None
 
     def wma(self, series, window):
-        weights = np.arange(1, window + 1)
-        return series.rolling(window).apply(lambda x: np.dot(x, weights)/weights.sum(), raw=True)
+        return wma_frame(series, window)
 
     def calculate_rrg_components_tradingview(self, stock_prices, benchmark_prices, window=20):
         stock_prices, benchmark_prices = stock_prices.align(benchmark_prices, join='inner')
@@ -68,37 +140,149 @@ class RelativeRotationData:
         rs_mom = rs_mom.dropna()
         return rs_ratio, rs_mom
 
-    def get_data(self):
+    def all_benchmarks(self):
+        # The extra benchmarks in their given order, plus the selected one if it is not among
+        # them; the order does not depend on the selection, so the price and cube cache keys
+        # stay the same when only the selected benchmark changes.
+        benchmarks = list(self.benchmarks or [])
+        if self.benchmark and self.benchmark not in benchmarks:
+            benchmarks.append(self.benchmark)
+        return list(dict.fromkeys(benchmarks))
+
+    def warmup_bars(self, window=None):
+        # Bars needed before the first displayed date so that its whole tail is defined:
+        # TradingView chains three WMAs (RS-Momentum starts at bar 3 * (window - 1)), the
+        # z-score needs `window` bars of one-bar ROC, the MA view its longest MA. `window`
+        # overrides the current window / longest MA, e.g. with the top of a sweep range.
+        if self.chart_type == "moving_average":
+            depth = (window or max(self.ma_short or 20, self.ma_long or 50)) - 1
+        elif self.rrg_method == "zscore":
+            depth = window or self.window or 21
+        else:
+            depth = 3 * ((window or self.window or 20) - 1)
+        return depth + self.tail_length
+
+    def fetch_start(self, window=None):
+        # Earliest date to load: the start of the displayed range minus the warm-up.
+        end_date = self.date or datetime.now()
+        start_date = self.start_date or end_date - timedelta(bars_to_days(DEFAULT_RANGE_BARS[self.frequency], self.frequency))
+        return start_date - timedelta(bars_to_days(self.warmup_bars(window), self.frequency))
+
+    def prices_cache_key(self, start_date):
+        end_date = self.date or datetime.now()
+        return (
+            "prices", self.data_source, self.local_data_path, tuple(self.symbols), tuple(self.all_benchmarks()),
+            pd.Timestamp(start_date).date(), pd.Timestamp(end_date).date(), self.frequency, self.study, self.compact
+        )
+
+    @instrumented("get_data")
+    def get_data(self, start_date=None):
+        # Loads from `start_date`, by default fetch_start(): only the displayed range plus the
+        # warm-up of the selected method. With a result_cache (e.g. the app's process-wide
+        # SharedCache) sessions asking for the same tickers and dates share one loaded copy.
+        start_date = start_date or self.fetch_start()
+        if self.result_cache is None:
+            self._load_prices(start_date)
+        else:
+            loaded = []
+
+            def load():
+                loaded.append(True)
+                self._load_prices(start_date)
+                return self.symbols_data, self.benchmark_data, self.price_matrix
+
+            self.symbols_data, self.benchmark_data, self.price_matrix = self.result_cache.get_or_compute(self.prices_cache_key(start_date), load)
+            if not loaded:
+                annotate(cache_hits=1)
+        self.failed_tickers = self.missing_tickers()
+        annotate(rows=len(self.symbols_data) if self.symbols_data is not None else 0)
+
+    def missing_tickers(self):
+        # Requested tickers without a single price in the loaded range: failed downloads come
+        # back as all-NaN columns, and a Local Folder ticker without a file has no column.
+        frames = [frame for frame in (self.symbols_data, self.benchmark_data) if frame is not None]
+        loaded = set()
+        for frame in frames:
+            loaded.update(frame.columns[frame.notna().any().to_numpy()])
+        return [ticker for ticker in dict.fromkeys(self.symbols + self.all_benchmarks()) if ticker not in loaded]
+
+    def get_data_async(self, start_date=None, executor=None):
+        # Future resolving to this object once get_data() has run on a worker thread.
+        def run():
+            self.get_data(start_date)
+            return self
+        return submit(executor or ASYNC_EXECUTOR, run)
+
+    def _load_prices(self, start_date):
+        end_date = self.date or datetime.now()
         if self.data_source == "Yahoo Finance":
-            end_date = self.date or datetime.now()
-            start_date = end_date - timedelta(5 * 90)
-            tickers = self.symbols + ([self.benchmark] if self.benchmark else [])
-            interval = "1d" if self.frequency == "daily" else "1wk"
-            data = yf.download(tickers, start=start_date, end=end_date, interval=interval)
-            if self.study == "price":
-                target_data = data["Close"]
-            elif self.study == "volume":
-                target_data = data["Volume"]
+            tickers = self.symbols + self.all_benchmarks()
+            interval = INTERVALS[self.frequency]
+            # Yahoo and the price cache treat `end` as exclusive; include the end date's bar
+            # as the Local Folder slice does.
+            fetch_end = end_date + timedelta(days=1)
+            if self.price_cache is not None:
+                field = "Volume" if self.study == "volume" else "Close"
+                before = self.price_cache.stats()
+                target_data = self.price_cache.get(tickers, start_date, fetch_end, interval=interval, field=field)
+                after = self.price_cache.stats()
+                annotate(cache_hits=after["hits"] - before["hits"], cache_misses=after["misses"] - before["misses"])
+            else:
+                data = self.fetcher(tickers, start_date, fetch_end, interval)
+                if self.study == "price":
+                    target_data = data["Close"]
+                elif self.study == "volume":
+                    target_data = data["Volume"]
             self.symbols_data = target_data[self.symbols]
             if self.benchmark:
-                self.benchmark_data = target_data[[self.benchmark]]
+                self.benchmark_data = target_data[self.all_benchmarks()]
 
         elif self.data_source == "Local Folder":
             if not self.local_data_path:
                 raise ValueError("Local data path must be provided for 'Local Folder'.")
             reader = DataReader({'source_market_data': self.local_data_path, 'dest_tickers_data': ""}, combined_file=None)
-            combined_df = pd.DataFrame()
-            for symbol in self.symbols:
-                try:
-                    df_symbol = reader.read_stock_data(symbol)
-                    combined_df[symbol] = df_symbol["Close"].rename(symbol)
-                except FileNotFoundError:
-                    continue
+            tickers = list(dict.fromkeys(self.symbols + self.all_benchmarks()))
+            combined_df = reader.read_close_matrix(tickers).loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+            if self.benchmark and self.benchmark not in combined_df.columns:
+                raise FileNotFoundError(f"No data file for benchmark '{self.benchmark}' in {self.local_data_path}.")
+            # Tickers without a file become all-NaN columns, reported by missing_tickers().
+            self.symbols_data = combined_df.reindex(columns=self.symbols)
             if self.benchmark:
-                df_benchmark = reader.read_stock_data(self.benchmark)
-                combined_df[self.benchmark] = df_benchmark["Close"]
-            self.symbols_data = combined_df[self.symbols]
-            self.benchmark_data = combined_df[[self.benchmark]]
+                self.benchmark_data = combined_df.reindex(columns=self.all_benchmarks())
+        self._compact_prices()
+
+    def resample_from(self, source):
+        # Build this object's bars from another object's already-loaded (daily) prices.
+        self.symbols_data = resample_prices(source.symbols_data, self.frequency)
+        self.benchmark_data = resample_prices(source.benchmark_data, self.frequency)
+        self._compact_prices()
+
+    def _compact_prices(self):
+        # Compact mode: keep prices in one float32 PriceMatrix and expose symbols_data /
+        # benchmark_data as views into it; the RRG kernels then stay in float32 end to end.
+        if not self.compact or self.symbols_data is None:
+            return
+        self.price_matrix = PriceMatrix.from_frames(self.symbols_data, self.benchmark_data)
+        self.symbols_data = self.price_matrix.symbols_frame()
+        if self.benchmark_data is not None:
+            self.benchmark_data = self.price_matrix.benchmark_frame()
+
+    def memory_usage(self):
+        # Bytes held by the loaded prices and the full-history RRG result.
+        usage = {"prices": 0, "rrg_result": 0, "rrg_data": 0}
+        if self.price_matrix is not None:
+            usage["prices"] = self.price_matrix.nbytes
+        else:
+            for frame in (self.symbols_data, self.benchmark_data):
+                if frame is not None:
+                    usage["prices"] += int(frame.memory_usage(index=True, deep=True).sum())
+        result = self.rrg_result_full if self.rrg_result_full is not None else self.rrg_result
+        if result is not None:
+            usage["rrg_result"] = result.rs_ratio.nbytes + result.rs_momentum.nbytes + result.dates.nbytes
+        data = self.rrg_data_full if self.rrg_data_full is not None else getattr(self, "rrg_data", None)
+        if data is not None:
+            usage["rrg_data"] = int(data.memory_usage(index=True, deep=True).sum())
+        return usage
 
     def calculate_rrg_components(self, stock_prices, benchmark_prices, window=21):
         stock_prices, benchmark_prices = stock_prices.align(benchmark_prices, join='inner')
@@ -112,83 +296,414 @@ class RelativeRotationData:
         rs_momentum = rs_momentum[rs_momentum.index.isin(rs_ratio.index)]
         return rs_ratio, rs_momentum
 
+    def calculate_rrg_components_batch(self, symbols_data, benchmark_prices, window=20):
+        if self.rrg_method == "zscore":
+            return calculate_rrg_batch_zscore(symbols_data, benchmark_prices, window=window)
+        return calculate_rrg_batch(symbols_data, benchmark_prices, window=window)
+
+    def load_precomputed_rrg(self, symbols):
+        # Use a snapshot written by precompute.py from the same source and study when it
+        # covers these symbols and is not older than the loaded prices, cut at the last
+        # loaded bar; otherwise return None and compute on request.
+        if not self.snapshot_dir or self.rrg_method != "tradingview":
+            return None
+        snapshot = load_snapshot(
+            self.snapshot_dir, self.benchmark, self.frequency, self.window or 20,
+            DATA_SOURCES.get(self.data_source), self.study, end=self.date
+        )
+        if snapshot is None or not set(symbols) <= set(snapshot.symbols):
+            return None
+        if self.symbols_data is not None and len(self.symbols_data) and snapshot.dates[-1] < self.symbols_data.index[-1]:
+            return None
+        if self.symbols_data is not None and len(self.symbols_data):
+            snapshot = snapshot.until(self.symbols_data.index[-1])
+        return snapshot.select(symbols)
+
     def process_rrg_data(self):
-        rrg_data = pd.DataFrame()
-        for symbol in self.symbols:
-            if symbol != self.benchmark:
-                #if self.frequency == "daily":
-                rs_ratio, rs_momentum = self.calculate_rrg_components_tradingview(
-                        self.symbols_data[symbol],
-                        self.benchmark_data[self.benchmark],
-                        window=self.window or 20
-                )
-                #else:
-                #    rs_ratio, rs_momentum = self.calculate_rrg_components(
-                #        self.symbols_data[symbol],
-                #        self.benchmark_data[self.benchmark],
-                #        window=self.window or 20
-                #    )
-                rrg_data[f'{symbol}_RS_Ratio'] = rs_ratio
-                rrg_data[f'{symbol}_RS_Momentum'] = rs_momentum
-        self.rrg_data = rrg_data
-
-    def process_moving_average_data(self):
-        rrg_data = pd.DataFrame()
-        for symbol in self.symbols:
-            if symbol != self.benchmark:
-                short_ma_window = self.ma_short if self.ma_short else 20
-                long_ma_window = self.ma_long if self.ma_long else 50
-                short_ma = self.symbols_data[symbol].rolling(window=short_ma_window).mean()
-                long_ma = self.symbols_data[symbol].rolling(window=long_ma_window).mean()
-                rrg_data[f'{symbol}_ShortMA'] = (self.symbols_data[symbol] - short_ma) / short_ma * 100
-                rrg_data[f'{symbol}_LongMA'] = (self.symbols_data[symbol] - long_ma) / long_ma * 100
-        self.rrg_data = rrg_data
+        symbols = [symbol for symbol in self.symbols if symbol != self.benchmark]
+        precomputed = self.load_precomputed_rrg(symbols)
+        if precomputed is not None:
+            self.rrg_result = precomputed
+            self.rrg_data = precomputed.to_frame()
+            return
+        self.rrg_result = self.calculate_rrg_components_batch(
+            self.symbols_data[symbols],
+            self.benchmark_data[self.benchmark],
+            window=self.window or 20
+        )
+        self.rrg_data = self.rrg_result.to_frame()
+
+    def incremental_state(self):
+        # Streaming RRG seeded from the loaded history; feed new bars with .update().
+        symbols = [symbol for symbol in self.symbols if symbol != self.benchmark]
+        state = IncrementalRRG(symbols, window=self.window or 20)
+        return state.seed(self.symbols_data, self.benchmark_data[self.benchmark])
+
+    def process_moving_average_data(self, windows=None):
+        # Distance from the short and long MA for all symbols in one 2-D prefix-sum pass;
+        # extra `windows` go into the same pass so other short/long pairs are a lookup via
+        # select_ma_pair(). With ma_relative the distances are taken on price / benchmark.
+        short, long = self.ma_short or 20, self.ma_long or 50
+        windows = sorted(set(windows or []) | {short, long})
+        symbols = [symbol for symbol in self.symbols if symbol != self.benchmark]
+        relative = self.ma_relative and self.benchmark_data is not None and self.benchmark in self.benchmark_data.columns
+        benchmark_prices = self.benchmark_data[self.benchmark] if relative else None
 
+        def compute():
+            return calculate_ma_sweep(self.symbols_data[symbols], windows, benchmark_prices)
+
+        if self.result_cache is None:
+            self.ma_sweep = compute()
+        else:
+            key = ("ma", frame_fingerprint(self.symbols_data, self.benchmark_data), tuple(symbols), self.benchmark if relative else None, tuple(windows), self.frequency)
+            self.ma_sweep = self.result_cache.get_or_compute(key, compute)
+        self.rrg_result = self.ma_sweep.for_pair(short, long)
+        self.rrg_data = self.rrg_result.to_frame()
+
+    def select_ma_pair(self, short, long):
+        # Falls back to a regular computation for windows outside the computed set.
+        self.ma_short, self.ma_long = short, long
+        if self.ma_sweep is None or short not in self.ma_sweep or long not in self.ma_sweep:
+            self._full_rotation_key = None
+            return None
+        symbols = [symbol for symbol in self.symbols if symbol != self.benchmark]
+        self.rrg_result = self.ma_sweep.for_pair(short, long, symbols)
+        self.rrg_data = self.rrg_result.to_frame()
+        self.rrg_result_full, self.rrg_data_full = self.rrg_result, self.rrg_data
+        self._full_rotation_key = self._full_rotation_state()
+        return self.rrg_data
+
+    def process_multi_benchmark(self):
+        # One pass over every loaded benchmark column; the cube is shared through result_cache
+        # so switching benchmark is a lookup via select_benchmark().
+        def compute():
+            return calculate_rrg_multi_benchmark(self.symbols_data[self.symbols], self.benchmark_data, window=self.window or 20)
+
+        if self.result_cache is None:
+            self.rrg_cube = compute()
+        else:
+            key = ("cube", frame_fingerprint(self.symbols_data, self.benchmark_data), tuple(self.symbols), self.window, self.frequency)
+            self.rrg_cube = self.result_cache.get_or_compute(key, compute)
+        return self.rrg_cube
+
+    def select_benchmark(self, benchmark):
+        if self.rrg_cube is None:
+            self.process_multi_benchmark()
+        self.benchmark = benchmark
+        symbols = [symbol for symbol in self.symbols if symbol != benchmark]
+        self.rrg_result = self.rrg_cube.for_benchmark(benchmark, symbols)
+        self.rrg_data = self.rrg_result.to_frame()
+        self.rrg_result_full, self.rrg_data_full = self.rrg_result, self.rrg_data
+        self._full_rotation_key = self._full_rotation_state()
+        return self.rrg_data
+
+    def process_window_sweep(self, windows):
+        # RS-Ratio / RS-Momentum for every window in `windows` against every loaded benchmark,
+        # shared through result_cache so a window or benchmark change is a lookup via
+        # select_window(). Past SWEEP_MAX_BYTES only the selected benchmark is swept.
+        benchmarks = list(self.benchmark_data.columns)
+        itemsize = 4 if self.compact else 8
+        if 2 * itemsize * len(windows) * len(self.symbols_data) * len(benchmarks) * len(self.symbols) > SWEEP_MAX_BYTES:
+            benchmarks = [self.benchmark]
+
+        def compute():
+            return calculate_rrg_multi_benchmark_sweep(self.symbols_data[self.symbols], self.benchmark_data[benchmarks], windows)
+
+        if self.result_cache is None:
+            self.rrg_sweep = compute()
+        else:
+            key = ("sweep", frame_fingerprint(self.symbols_data, self.benchmark_data), tuple(self.symbols), tuple(benchmarks), tuple(sorted(set(windows))), self.frequency)
+            self.rrg_sweep = self.result_cache.get_or_compute(key, compute)
+        return self.rrg_sweep
+
+    def select_window(self, window):
+        # Falls back to a regular computation for a window or benchmark outside the sweep.
+        self.window = window
+        if self.rrg_sweep is None or window not in self.rrg_sweep or self.benchmark not in self.rrg_sweep.benchmarks:
+            self._full_rotation_key = None
+            return None
+        symbols = [symbol for symbol in self.symbols if symbol != self.benchmark]
+        self.rrg_result = self.rrg_sweep.for_window(window, symbols, self.benchmark)
+        self.rrg_data = self.rrg_result.to_frame()
+        self.rrg_result_full, self.rrg_data_full = self.rrg_result, self.rrg_data
+        self._full_rotation_key = self._full_rotation_state()
+        return self.rrg_data
+
+    def rotation_cache_key(self):
+        return (
+            frame_fingerprint(self.symbols_data, self.benchmark_data),
+            tuple(self.symbols), self.benchmark, self.window, self.ma_short, self.ma_long,
+            self.frequency, self.chart_type, self.rrg_method, self.ma_relative
+        )
+
+    @instrumented("process_rotation_data")
     def process_rotation_data(self):
+        if self.result_cache is not None:
+            key = self.rotation_cache_key()
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                self.rrg_data, self.rrg_result = cached
+                annotate(rows=len(self.rrg_data), cache_hits=1)
+                return
         if self.chart_type == "rrg":
             self.process_rrg_data()
         elif self.chart_type == "moving_average":
             self.process_moving_average_data()
+        if self.result_cache is not None:
+            self.result_cache.put(key, (self.rrg_data, self.rrg_result))
+        annotate(rows=len(self.rrg_data), cache_misses=1 if self.result_cache is not None else 0)
+
+    def _full_rotation_state(self):
+        return (
+            id(self.symbols_data), id(self.benchmark_data), tuple(self.symbols), self.benchmark,
+            self.window, self.ma_short, self.ma_long, self.chart_type, self.rrg_method, self.ma_relative
+        )
+
+    def process_rotation_until(self, date):
+        # The indicators are causal, so slicing the full-history result at `date` equals
+        # recomputing on data truncated at `date`; the full result is computed once per
+        # loaded data/parameter set and each call is an index lookup.
+        key = self._full_rotation_state()
+        if self._full_rotation_key != key:
+            self.process_rotation_data()
+            self.rrg_data_full, self.rrg_result_full = self.rrg_data, self.rrg_result
+            self._full_rotation_key = key
+        end = self.rrg_data_full.index.searchsorted(pd.Timestamp(date), side='right')
+        self.rrg_data = self.rrg_data_full.iloc[:end]
+        self.rrg_result = self.rrg_result_full.until(date) if self.rrg_result_full is not None else None
+        return self.rrg_data
+
+    def rotation_plot_async(self, date, symbols=None, sweep_windows=None, ma_windows=None, mode="auto", executor=None):
+        # Future resolving to the RRG figure at `date`, computed on a worker thread so the
+        # daily and weekly charts can be built concurrently and drawn as each one finishes.
+        # A result_cache shared between objects must be thread-safe (SharedCache).
+        def run():
+            if ma_windows is not None:
+                self.process_moving_average_data(ma_windows)
+                self.select_ma_pair(self.ma_short or 20, self.ma_long or 50)
+            elif sweep_windows is not None:
+                self.process_window_sweep(sweep_windows)
+                self.select_window(self.window)
+            self.process_rotation_until(date)
+            if symbols is not None:
+                self.symbols = symbols
+            return self.create_rrg_plot(mode=mode)
+        return submit(executor or ASYNC_EXECUTOR, run)
+
+    def add_rrg_quadrants(self, fig):
+        # --- FIXED AXES AND QUADRANTS (like StockCharts) ---
+        x_range = [88, 112]
+        y_range = [90, 112]
+        fig.update_xaxes(range=x_range)
+        fig.update_yaxes(range=y_range)
+
+        center_x = 100
+        center_y = 100
+        x0, x1 = x_range
+        y0, y1 = y_range
+
+        quadrant_colors = [
+            'rgba(0, 128, 0, 0.4)',     # Leading (Green)
+            'rgba(255, 255, 0, 0.4)',   # Weakening (Yellow)
+            'rgba(255, 0, 0, 0.4)',     # Lagging (Red)
+            'rgba(0, 0, 255, 0.4)'      # Improving (Blue)
+        ]
+        # Draw quadrants with fixed boundaries
+        fig.add_shape(type="rect", x0=center_x, y0=center_y, x1=x1, y1=y1, fillcolor=quadrant_colors[0], line_color="Gray", opacity=0.6)
+        fig.add_shape(type="rect", x0=x0, y0=center_y, x1=center_x, y1=y1, fillcolor=quadrant_colors[3], line_color="Gray", opacity=0.6)
+        fig.add_shape(type="rect", x0=x0, y0=y0, x1=center_x, y1=center_y, fillcolor=quadrant_colors[2], line_color="Gray", opacity=0.6)
+        fig.add_shape(type="rect", x0=center_x, y0=y0, x1=x1, y1=center_y, fillcolor=quadrant_colors[1], line_color="Gray", opacity=0.6)
 
-    def create_rrg_plot(self):
+        fig.add_shape(type="line", x0=center_x, y0=y0, x1=center_x, y1=y1, line=dict(color="Gray", width=1, dash="dot"))
+        fig.add_shape(type="line", x0=x0, y0=center_y, x1=x1, y1=center_y, line=dict(color="Gray", width=1, dash="dot"))
+
+        fig.add_annotation(x=x1-2, y=y1-2, text="Leading", showarrow=False, font=dict(size=14), align="center")
+        fig.add_annotation(x=x0+2, y=y1-2, text="Improving", showarrow=False, font=dict(size=14), align="center")
+        fig.add_annotation(x=x0+2, y=y0+2, text="Lagging", showarrow=False, font=dict(size=14), align="center")
+        fig.add_annotation(x=x1-2, y=y0+2, text="Weakening", showarrow=False, font=dict(size=14), align="center")
+
+    def _plot_symbols(self):
+        return [symbol for symbol in self.symbols if symbol != self.benchmark]
+
+    def _tail_arrays(self, symbols):
+        # (dates, RS-Ratio, RS-Momentum) for the last `tail_length` rows as (tail x symbols) arrays.
+        if self.rrg_result is not None:
+            result = self.rrg_result
+            valid = ~(np.isnan(result.rs_ratio).all(axis=1) & np.isnan(result.rs_momentum).all(axis=1))
+            rows = np.flatnonzero(valid)[-self.tail_length:]
+            position = {symbol: j for j, symbol in enumerate(result.symbols)}
+            cols = [position[symbol] for symbol in symbols]
+            return result.dates[rows], result.rs_ratio[np.ix_(rows, cols)], result.rs_momentum[np.ix_(rows, cols)]
+        tail = self.rrg_data.iloc[-self.tail_length:]
+        return (
+            tail.index,
+            tail[[f'{symbol}_RS_Ratio' for symbol in symbols]].to_numpy(),
+            tail[[f'{symbol}_RS_Momentum' for symbol in symbols]].to_numpy()
+        )
+
+    def _packed_arrays(self, symbols, xs, ys, spans=(24, 22)):
+        # Trails packed into one NaN-separated trace per palette colour in use, plus the
+        # direction heads: [(x, y) per colour..., (x, y, angle) for the heads].
+        palette = px.colors.qualitative.Dark24
+        color_index = np.arange(len(symbols)) % len(palette)
+        gap = np.full((1, len(symbols)), np.nan)
+        xs_packed = np.vstack([xs, gap])
+        ys_packed = np.vstack([ys, gap])
+        packed = []
+        for c in np.unique(color_index):
+            cols = np.flatnonzero(color_index == c)
+            packed.append((xs_packed[:, cols].ravel(order='F'), ys_packed[:, cols].ravel(order='F')))
+        if len(xs) >= 2:
+            # Marker angles are clockwise from north; scale by the axis spans so the heads
+            # point along the last segment as drawn (the fixed 88-112 / 90-112 RRG axes).
+            angle = np.degrees(np.arctan2((xs[-1] - xs[-2]) / spans[0], (ys[-1] - ys[-2]) / spans[1]))
+        else:
+            angle = np.zeros(len(symbols))
+        packed.append((xs[-1], ys[-1], np.nan_to_num(angle)))
+        return packed
+
+    def _packed_traces(self, symbols, xs, ys, spans=(24, 22)):
+        # Styled Scattergl traces for _packed_arrays(), so the number of traces and
+        # annotations doesn't grow with the symbol count.
+        palette = px.colors.qualitative.Dark24
+        color_index = np.arange(len(symbols)) % len(palette)
+        packed = self._packed_arrays(symbols, xs, ys, spans)
+        _, x_title, y_title = self._axis_titles()
+        hovertemplate = f"%{{text}}<br>{x_title} %{{x:.2f}}<br>{y_title} %{{y:.2f}}<extra></extra>"
+        traces = []
+        for c, (x, y) in zip(np.unique(color_index), packed[:-1]):
+            traces.append(go.Scattergl(
+                x=x, y=y,
+                text=np.repeat(symbols[color_index == c], len(xs) + 1),
+                mode='lines+markers',
+                line=dict(color=palette[c], width=1.5),
+                marker=dict(color=palette[c], size=4),
+                hovertemplate=hovertemplate,
+                showlegend=False
+            ))
+        x, y, angle = packed[-1]
+        traces.append(go.Scattergl(
+            x=x, y=y,
+            text=symbols,
+            mode='markers+text',
+            textposition='top center',
+            marker=dict(symbol='arrow', angle=angle, size=11, color=np.array(palette)[color_index]),
+            hovertemplate=hovertemplate,
+            showlegend=False
+        ))
+        return traces
+
+    def _axis_titles(self):
+        if self.chart_type == "rrg":
+            return "Relative Rotation Graph (Momentum)", "RS-Ratio", "RS-Momentum"
+        basis = "RS" if self.ma_relative else "price"
+        return "Moving Average Rotation", f"% {basis} vs {self.ma_short or 20}-bar MA", f"% {basis} vs {self.ma_long or 50}-bar MA"
+
+    def _rrg_layout(self, fig):
+        title, x_title, y_title = self._axis_titles()
+        fig.update_layout(
+            title=title,
+            xaxis_title=x_title,
+            yaxis_title=y_title,
+            width=500, height=600,
+            template="plotly_white"
+        )
+
+    def add_ma_axes(self, fig, xs, ys):
+        # MA distances are centred on 0 and unbounded: zero lines instead of fixed quadrants.
+        # Returns the data spans used to orient the arrow heads.
+        fig.add_hline(y=0, line=dict(color="Gray", width=1, dash="dot"))
+        fig.add_vline(x=0, line=dict(color="Gray", width=1, dash="dot"))
+        spans = [np.nanmax(v) - np.nanmin(v) if np.isfinite(v).any() else 1.0 for v in (xs, ys)]
+        return tuple(span if span > 0 else 1.0 for span in spans)
+
+    def create_rrg_plot_fast(self):
+        # High-cardinality mode, see _packed_traces().
         fig = go.Figure()
-        if self.chart_type == "rrg":  # RRG: Momentum
-            latest_dates = self.rrg_data.index[-self.tail_length:]
-            latest_data = self.rrg_data.loc[latest_dates]
+        symbols = np.array(self._plot_symbols())
+        _, xs, ys = self._tail_arrays(list(symbols))
+        if self.chart_type == "rrg":
+            self.add_rrg_quadrants(fig)
+            spans = (24, 22)
+        else:
+            spans = self.add_ma_axes(fig, xs, ys)
+        fig.add_traces(self._packed_traces(symbols, xs, ys, spans))
+        self._rrg_layout(fig)
+        return fig
 
+    @instrumented("create_rrg_animation")
+    def create_rrg_animation(self, start=None, end=None, frame_duration=150):
+        # Playback mode: one Plotly frame per date in [start, end] holding every symbol's
+        # tail at that date, sliced from the full-history batch result, plus a play button
+        # and frame slider; the browser animates without a Streamlit rerun per date.
+        if self._full_rotation_key != self._full_rotation_state():
+            self.process_rotation_until(self.symbols_data.index[-1])
+        result = self.rrg_result_full
+        symbols = np.array(self._plot_symbols())
+        position = {symbol: j for j, symbol in enumerate(result.symbols)}
+        cols = [position[symbol] for symbol in symbols]
+        ratio = result.rs_ratio[:, cols]
+        momentum = result.rs_momentum[:, cols]
+        rows = np.flatnonzero(~(np.isnan(ratio).all(axis=1) & np.isnan(momentum).all(axis=1)))
+        if len(symbols) == 0 or len(rows) == 0:
+            # Nothing to animate (e.g. every ticker deselected): empty chart, like the static view.
+            fig = go.Figure()
+            self.add_rrg_quadrants(fig)
+            self._rrg_layout(fig)
+            return fig
+        dates = result.dates[rows]
+        first = dates.searchsorted(pd.Timestamp(start)) if start is not None else 0
+        last = dates.searchsorted(pd.Timestamp(end), side='right') if end is not None else len(rows)
+        first = max(first, min(self.tail_length, last) - 1)
+        annotate(rows=(last - first) * len(symbols) * self.tail_length)
+
+        # Frames only carry the coordinates (and head angles); styling, hover text and trace
+        # count come from the base traces. Frame traces are plain dicts of lists, added without
+        # plotly's per-object validation, which would otherwise dominate the build time.
+        frames = []
+        for k in range(first, last):
+            tail = rows[max(0, k - self.tail_length + 1):k + 1]
+            packed = self._packed_arrays(symbols, ratio[tail], momentum[tail])
+            data = [dict(type='scattergl', x=x.tolist(), y=y.tolist()) for x, y in packed[:-1]]
+            x, y, angle = packed[-1]
+            data.append(dict(type='scattergl', x=x.tolist(), y=y.tolist(), marker=dict(angle=angle.tolist())))
+            frames.append(dict(name=str(dates[k].date()), data=data))
+        last_tail = rows[max(0, last - self.tail_length):last]
+        fig = go.Figure(data=self._packed_traces(symbols, ratio[last_tail], momentum[last_tail]), frames=frames, _validate=False)
+        self.add_rrg_quadrants(fig)
+        self._rrg_layout(fig)
+        play = dict(frame=dict(duration=frame_duration, redraw=True), transition=dict(duration=0), fromcurrent=True)
+        # WebGL traces only update on redraw, so seeking with the slider redraws too.
+        seek = dict(frame=dict(duration=0, redraw=True), mode="immediate", transition=dict(duration=0))
+        pause = dict(frame=dict(duration=0, redraw=False), mode="immediate", transition=dict(duration=0))
+        fig.update_layout(
+            updatemenus=[dict(
+                type="buttons", direction="left", x=0, y=-0.12, xanchor="left", yanchor="top", showactive=False,
+                buttons=[dict(label="Play", method="animate", args=[None, play]),
+                         dict(label="Pause", method="animate", args=[[None], pause])]
+            )],
+            sliders=[dict(
+                active=len(frames) - 1, x=0.15, y=-0.08, len=0.85, currentvalue=dict(prefix="Date: "),
+                steps=[dict(label=frame["name"], method="animate", args=[[frame["name"]], seek]) for frame in frames]
+            )],
+            height=700
+        )
+        return fig
+
+    @instrumented("create_rrg_plot")
+    def create_rrg_plot(self, mode: Literal["auto", "standard", "fast"] = "auto"):
+        annotate(rows=len(self._plot_symbols()) * self.tail_length)
+        if mode == "fast" or (mode == "auto" and len(self._plot_symbols()) > HIGH_CARDINALITY_THRESHOLD):
+            return self.create_rrg_plot_fast()
+        fig = go.Figure()
+        latest_dates = self.rrg_data.index[-self.tail_length:]
+        latest_data = self.rrg_data.loc[latest_dates]
+        x_metric, y_metric = self.rrg_result.metrics if self.rrg_result is not None else ("RS_Ratio", "RS_Momentum")
+        if self.chart_type == "rrg":  # RRG: Momentum
             ratio_cols = [f'{symbol}_RS_Ratio' for symbol in self.symbols if symbol != self.benchmark]
             momentum_cols = [f'{symbol}_RS_Momentum' for symbol in self.symbols if symbol != self.benchmark]
 
-            # --- FIXED AXES AND QUADRANTS (like StockCharts) ---
-            x_range = [88, 112]
-            y_range = [90, 112]
-            fig.update_xaxes(range=x_range)
-            fig.update_yaxes(range=y_range)
-
-            center_x = 100
-            center_y = 100
-            x0, x1 = x_range
-            y0, y1 = y_range
-
-            quadrant_colors = [
-                'rgba(0, 128, 0, 0.4)',     # Leading (Green)
-                'rgba(255, 255, 0, 0.4)',   # Weakening (Yellow)
-                'rgba(255, 0, 0, 0.4)',     # Lagging (Red)
-                'rgba(0, 0, 255, 0.4)'      # Improving (Blue)
-            ]
-            # Draw quadrants with fixed boundaries
-            fig.add_shape(type="rect", x0=center_x, y0=center_y, x1=x1, y1=y1, fillcolor=quadrant_colors[0], line_color="Gray", opacity=0.6)
-            fig.add_shape(type="rect", x0=x0, y0=center_y, x1=center_x, y1=y1, fillcolor=quadrant_colors[3], line_color="Gray", opacity=0.6)
-            fig.add_shape(type="rect", x0=x0, y0=y0, x1=center_x, y1=center_y, fillcolor=quadrant_colors[2], line_color="Gray", opacity=0.6)
-            fig.add_shape(type="rect", x0=center_x, y0=y0, x1=x1, y1=center_y, fillcolor=quadrant_colors[1], line_color="Gray", opacity=0.6)
-
-            fig.add_shape(type="line", x0=center_x, y0=y0, x1=center_x, y1=y1, line=dict(color="Gray", width=1, dash="dot"))
-            fig.add_shape(type="line", x0=x0, y0=center_y, x1=x1, y1=center_y, line=dict(color="Gray", width=1, dash="dot"))
-
-            fig.add_annotation(x=x1-2, y=y1-2, text="Leading", showarrow=False, font=dict(size=14), align="center")
-            fig.add_annotation(x=x0+2, y=y1-2, text="Improving", showarrow=False, font=dict(size=14), align="center")
-            fig.add_annotation(x=x0+2, y=y0+2, text="Lagging", showarrow=False, font=dict(size=14), align="center")
-            fig.add_annotation(x=x1-2, y=y0+2, text="Weakening", showarrow=False, font=dict(size=14), align="center")
+            self.add_rrg_quadrants(fig)
 
             # Plot the trails for each symbol
             # colors = cycle(px.colors.qualitative.Dark24)
@@ -214,13 +729,15 @@ class RelativeRotationData:
             #     width=500, height=600,
             #     template="plotly_white"
             # )
+        else:
+            self.add_ma_axes(fig, latest_data.iloc[:, 0::2].to_numpy(), latest_data.iloc[:, 1::2].to_numpy())
 
         colors = cycle(px.colors.qualitative.Dark24)
         for symbol in self.symbols:
             if symbol != self.benchmark:
                 color = next(colors)
-                xs = latest_data[f'{symbol}_RS_Ratio']
-                ys = latest_data[f'{symbol}_RS_Momentum']
+                xs = latest_data[f'{symbol}_{x_metric}']
+                ys = latest_data[f'{symbol}_{y_metric}']
         
                 # Plot the trail line with thicker width
                 fig.add_trace(go.Scatter(
@@ -254,13 +771,6 @@ class RelativeRotationData:
                         opacity=1,
                         text=""
                     )
-            fig.update_layout(
-                title="Relative Rotation Graph (Momentum)",
-                xaxis_title="RS-Ratio",
-                yaxis_title="RS-Momentum",
-                width=500, height=600,
-                template="plotly_white"
-            )
-
-        # (If you have code for moving averages, you may similarly set fixed axes)
+        self._rrg_layout(fig)
+
         return fig
@@ -0,0 +1,197 @@
+import time
+
+import hashlib
+
+import threading
+
+import numpy as np
+
+import pandas as pd
+
+from collections import OrderedDict
+
+
+def estimate_nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, (np.ndarray, pd.Index)):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if hasattr(value, "__dict__"):
+        return sum(estimate_nbytes(v) for v in vars(value).values())
+    return 0
+
+
+def frame_fingerprint(*frames):
+    # Content hash of index, columns and values; cheap next to recomputing indicators.
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in frames:
+        if frame is None:
+            digest.update(b"none")
+            continue
+        digest.update(repr(list(frame.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class LRUCache:
+    # Least-recently-used cache bounded by item count and an approximate memory budget.
+    def __init__(self, max_items=64, max_bytes=256 * 1024 ** 2):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return self._items[key][0]
+
+    def put(self, key, value, nbytes=None):
+        nbytes = estimate_nbytes(value) if nbytes is None else nbytes
+        if nbytes > self.max_bytes:
+            return value
+        if key in self._items:
+            self.current_bytes -= self._items.pop(key)[1]
+        self._items[key] = (value, nbytes)
+        self.current_bytes += nbytes
+        while len(self._items) > self.max_items or self.current_bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._items.popitem(last=False)
+            self.current_bytes -= evicted_bytes
+            self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute, nbytes=None):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute(), nbytes)
+        return value
+
+    def clear(self):
+        self._items.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        return {
+            "items": len(self._items), "bytes": self.current_bytes,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions
+        }
+
+
+def freeze(value):
+    # Mark the numpy arrays inside a cached value read-only so a session can't mutate a shared
+    # copy. For frames and series these are the blocks pandas writes into (and the arrays they
+    # view), so an in-place assignment raises instead of changing every session's data.
+    if isinstance(value, np.ndarray):
+        while isinstance(value, np.ndarray):
+            value.flags.writeable = False
+            value = value.base
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        for array in value._mgr.arrays:
+            freeze(getattr(array, "_ndarray", array))
+    elif isinstance(value, (tuple, list)):
+        for v in value:
+            freeze(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            freeze(v)
+    elif hasattr(value, "__dict__") and not isinstance(value, pd.Index):
+        for v in vars(value).values():
+            freeze(v)
+    return value
+
+
+def share(value):
+    # The cached value with each frame and series replaced by a shallow copy: sessions get
+    # their own frame objects over the same frozen data, so a structural change or (under
+    # pandas copy-on-write) a write in one session never reaches the cached frame.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(share(v) for v in value)
+    if isinstance(value, list):
+        return [share(v) for v in value]
+    if isinstance(value, dict):
+        return {k: share(v) for k, v in value.items()}
+    return value
+
+
+class SharedCache(LRUCache):
+    # Process-wide, thread-safe LRUCache for values shared by reference across Streamlit
+    # sessions: entries expire `ttl` seconds after they were stored, arrays are frozen
+    # read-only on insert and frames handed out as shallow copies (see share()), and
+    # get_or_compute() lets concurrent callers asking for the same key wait for a single
+    # computation instead of each running their own.
+    def __init__(self, max_items=256, max_bytes=1024 ** 3, ttl=15 * 60, clock=time.monotonic):
+        super().__init__(max_items=max_items, max_bytes=max_bytes)
+        self.ttl = ttl
+        self.clock = clock
+        self._stored_at = {}
+        self._lock = threading.RLock()
+        self._key_locks = {}
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items and not self._expired(key)
+
+    def _expired(self, key):
+        if self.ttl is None or self.clock() - self._stored_at[key] <= self.ttl:
+            return False
+        self.current_bytes -= self._items.pop(key)[1]
+        del self._stored_at[key]
+        self.evictions += 1
+        return True
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items and self._expired(key):
+                self.misses += 1
+                return default
+            return share(super().get(key, default))
+
+    def put(self, key, value, nbytes=None):
+        freeze(value)
+        with self._lock:
+            super().put(key, value, nbytes)
+            if key in self._items:
+                self._stored_at[key] = self.clock()
+            for stale in [k for k in self._stored_at if k not in self._items]:
+                del self._stored_at[stale]
+        return share(value)
+
+    def get_or_compute(self, key, compute, nbytes=None):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = self.put(key, compute(), nbytes)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._stored_at.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(super().stats(), ttl=self.ttl)
@@ -0,0 +1,460 @@
+import numpy as np
+
+import pandas as pd
+
+
+# float32 results stay within this absolute distance of the float64 path for RS-Ratio and
+# RS-Momentum (measured ~5e-5 on 500 random-walk symbols over 2 and 20 years, daily and weekly).
+COMPACT_TOLERANCE = 1e-4
+
+
+def as_float_array(data):
+    # float32 frames stay float32 (compact mode); everything else is computed in float64.
+    values = data.to_numpy()
+    return values if values.dtype == np.float32 else data.to_numpy(dtype=np.float64)
+
+
+class PriceMatrix:
+    # Compact price panel: a dates index, a symbol list and one (dates x symbols) matrix.
+    # Symbols come first and benchmark columns last, so both frames handed to the rest of
+    # RelativeRotationData are column-slice views of the same block.
+    def __init__(self, dates, symbols, values, n_symbols=None):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.values = values
+        self.n_symbols = len(self.symbols) if n_symbols is None else n_symbols
+
+    @classmethod
+    def from_frames(cls, symbols_data, benchmark_data=None, dtype=np.float32):
+        frames = [symbols_data] if benchmark_data is None else [symbols_data, benchmark_data.reindex(symbols_data.index)]
+        values = np.concatenate([f.to_numpy(dtype=dtype) for f in frames], axis=1)
+        symbols = [c for f in frames for c in f.columns]
+        return cls(symbols_data.index, symbols, values, n_symbols=len(symbols_data.columns))
+
+    def frame(self, cols):
+        return pd.DataFrame(self.values[:, cols], index=self.dates, columns=self.symbols[cols], copy=False)
+
+    def symbols_frame(self):
+        return self.frame(slice(0, self.n_symbols))
+
+    def benchmark_frame(self):
+        return self.frame(slice(self.n_symbols, None))
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.dates.nbytes
+
+
+def wma_2d(values, window):
+    # Linearly weighted moving average over axis 0 of a (dates x symbols) array.
+    # Accumulates the window as `window` shifted slices instead of calling a
+    # Python function per bar; a window containing a NaN yields NaN, exactly
+    # like rolling(window).apply(...).
+    values = np.asarray(values)
+    if not np.issubdtype(values.dtype, np.floating):
+        values = values.astype(np.float64)
+    squeeze = values.ndim == 1
+    if squeeze:
+        values = values[:, None]
+    n_rows = values.shape[0]
+    out = np.full(values.shape, np.nan, dtype=values.dtype)
+    if window < 1 or n_rows < window:
+        return out[:, 0] if squeeze else out
+    n_out = n_rows - window + 1
+    acc = np.zeros((n_out,) + values.shape[1:], dtype=values.dtype)
+    for k in range(window):
+        acc += (k + 1) * values[k:k + n_out]
+    out[window - 1:] = acc / (window * (window + 1) / 2)
+    return out[:, 0] if squeeze else out
+
+
+def wma_frame(data, window):
+    # pandas wrapper around wma_2d keeping index/columns of a Series or DataFrame.
+    if isinstance(data, pd.Series):
+        return pd.Series(wma_2d(as_float_array(data), window), index=data.index, name=data.name)
+    return pd.DataFrame(wma_2d(as_float_array(data), window), index=data.index, columns=data.columns)
+
+
+def rrg_tradingview_2d(prices, benchmark, window):
+    # TradingView-style RS-Ratio / RS-Momentum for a (dates x symbols) price
+    # matrix against a (dates,) benchmark vector in one broadcast pass.
+    rs = np.asarray(prices) / np.asarray(benchmark)[:, None]
+    rs_ratio = wma_2d(rs / wma_2d(rs, window), window) * 100
+    rs_mom = rs_ratio / wma_2d(rs_ratio, window) * 100
+    return rs_ratio, rs_mom
+
+
+class RRGBatchResult:
+    # `metrics` names the two matrices in to_frame()/to_long(); the moving-average view
+    # stores its short/long MA distances here as ("ShortMA", "LongMA").
+    def __init__(self, dates, symbols, rs_ratio, rs_momentum, metrics=("RS_Ratio", "RS_Momentum")):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.rs_ratio = rs_ratio
+        self.rs_momentum = rs_momentum
+        self.metrics = tuple(metrics)
+
+    def until(self, date):
+        # Rows up to and including `date`, as views of the full-history arrays.
+        end = self.dates.searchsorted(pd.Timestamp(date), side='right')
+        return RRGBatchResult(self.dates[:end], self.symbols, self.rs_ratio[:end], self.rs_momentum[:end], self.metrics)
+
+    def select(self, symbols):
+        position = {symbol: j for j, symbol in enumerate(self.symbols)}
+        cols = [position[symbol] for symbol in symbols]
+        return RRGBatchResult(self.dates, symbols, self.rs_ratio[:, cols], self.rs_momentum[:, cols], self.metrics)
+
+    def to_frame(self):
+        # Flat `{symbol}_RS_Ratio` / `{symbol}_RS_Momentum` layout used by create_rrg_plot,
+        # filled into one pre-allocated block; rows without any value are dropped.
+        n_dates, n_symbols = self.rs_ratio.shape
+        values = np.empty((n_dates, 2 * n_symbols), dtype=self.rs_ratio.dtype)
+        values[:, 0::2] = self.rs_ratio
+        values[:, 1::2] = self.rs_momentum
+        columns = [f'{symbol}_{metric}' for symbol in self.symbols for metric in self.metrics]
+        keep = ~np.isnan(values).all(axis=1)
+        return pd.DataFrame(values[keep], index=self.dates[keep], columns=columns)
+
+    def to_long(self):
+        x_metric, y_metric = self.metrics
+        frame = pd.DataFrame({
+            'date': np.repeat(self.dates, len(self.symbols)),
+            'symbol': np.tile(self.symbols, len(self.dates)),
+            x_metric: self.rs_ratio.ravel(),
+            y_metric: self.rs_momentum.ravel(),
+        })
+        return frame.dropna(subset=[x_metric, y_metric], how='all').reset_index(drop=True)
+
+
+def calculate_rrg_batch(symbols_data, benchmark_prices, window=20):
+    symbols_data, benchmark_prices = symbols_data.align(benchmark_prices, join='inner', axis=0)
+    rs_ratio, rs_mom = rrg_tradingview_2d(as_float_array(symbols_data), as_float_array(benchmark_prices), window)
+    return RRGBatchResult(symbols_data.index, symbols_data.columns, rs_ratio, rs_mom)
+
+
+class RunningWMA:
+    # One WMA stage over a fixed window, advanced one row of symbols at a time.
+    # Keeps the last `window` inputs plus their plain and weighted sums, so each
+    # push costs O(symbols); sums are recomputed from the buffer whenever the ring
+    # wraps to stop floating-point drift from accumulating.
+    def __init__(self, window, n_symbols, dtype=np.float64):
+        self.window = window
+        self.divisor = window * (window + 1) / 2
+        self.buffer = np.full((window, n_symbols), np.nan, dtype=dtype)
+        self.pos = 0
+        self.resync()
+
+    def resync(self):
+        ordered = np.roll(self.buffer, -self.pos, axis=0)  # oldest first
+        filled = np.nan_to_num(ordered)
+        self.nan_count = np.isnan(ordered).sum(axis=0)
+        self.total = filled.sum(axis=0)
+        self.weighted = np.arange(1, self.window + 1) @ filled
+
+    def load(self, history):
+        # Seed with the last `window` rows of a (dates x symbols) history.
+        tail = history[-self.window:]
+        self.buffer[:] = np.nan
+        self.buffer[self.window - len(tail):] = tail
+        self.pos = 0
+        self.resync()
+        return self.value()
+
+    def push(self, row):
+        old = self.buffer[self.pos]
+        old_filled = np.nan_to_num(old)
+        new_filled = np.nan_to_num(row)
+        self.weighted = self.weighted - self.total + self.window * new_filled
+        self.total = self.total - old_filled + new_filled
+        self.nan_count = self.nan_count - np.isnan(old) + np.isnan(row)
+        self.buffer[self.pos] = row
+        self.pos = (self.pos + 1) % self.window
+        if self.pos == 0:
+            self.resync()
+        return self.value()
+
+    def value(self):
+        return np.where(self.nan_count == 0, self.weighted / self.divisor, np.nan)
+
+
+class IncrementalRRG:
+    # Streaming form of rrg_tradingview_2d: seed once from history, then feed one
+    # bar per update() and get the same RS-Ratio / RS-Momentum as a full recompute.
+    def __init__(self, symbols, window=20):
+        self.symbols = list(symbols)
+        self.window = window
+        self.last_date = None
+        self._stages = [RunningWMA(window, len(self.symbols)) for _ in range(3)]
+
+    def seed(self, symbols_data, benchmark_prices):
+        symbols_data, benchmark_prices = symbols_data[self.symbols].align(benchmark_prices, join='inner', axis=0)
+        rs = symbols_data.to_numpy(dtype=np.float64) / benchmark_prices.to_numpy(dtype=np.float64)[:, None]
+        ratio_input = rs / wma_2d(rs, self.window)
+        rs_ratio = wma_2d(ratio_input, self.window) * 100
+        self._stages[0].load(rs)
+        self._stages[1].load(ratio_input)
+        self._stages[2].load(rs_ratio)
+        self.last_date = symbols_data.index[-1] if len(symbols_data) else None
+        return self
+
+    def update(self, prices, benchmark_price, date=None):
+        # `prices` is one bar per symbol (array-like in self.symbols order, or a Series keyed by symbol).
+        if isinstance(prices, pd.Series):
+            prices = prices.reindex(self.symbols)
+        rs = np.asarray(prices, dtype=np.float64) / float(benchmark_price)
+        wma_rs = self._stages[0].push(rs)
+        rs_ratio = self._stages[1].push(rs / wma_rs) * 100
+        rs_mom = rs_ratio / self._stages[2].push(rs_ratio) * 100
+        self.last_date = date
+        return rs_ratio, rs_mom
+
+
+def rrg_tradingview_multi(prices, benchmarks, window):
+    # (dates x symbols) prices against (dates x benchmarks) in one broadcast division;
+    # the WMA stages run along axis 0 of the (dates x benchmarks x symbols) RS array.
+    rs = np.asarray(prices)[:, None, :] / np.asarray(benchmarks)[:, :, None]
+    rs_ratio = wma_2d(rs / wma_2d(rs, window), window) * 100
+    rs_mom = rs_ratio / wma_2d(rs_ratio, window) * 100
+    return rs_ratio, rs_mom
+
+
+class RRGCube:
+    # RS-Ratio / RS-Momentum for several benchmarks, stored as (dates x benchmarks x symbols).
+    def __init__(self, dates, benchmarks, symbols, rs_ratio, rs_momentum):
+        self.dates = dates
+        self.benchmarks = list(benchmarks)
+        self.symbols = list(symbols)
+        self.rs_ratio = rs_ratio
+        self.rs_momentum = rs_momentum
+
+    def as_array(self):
+        # (benchmark x symbol x date) views of the two metrics.
+        return self.rs_ratio.transpose(1, 2, 0), self.rs_momentum.transpose(1, 2, 0)
+
+    def for_benchmark(self, benchmark, symbols=None):
+        b = self.benchmarks.index(benchmark)
+        result = RRGBatchResult(self.dates, self.symbols, self.rs_ratio[:, b, :], self.rs_momentum[:, b, :])
+        return result.select(symbols) if symbols is not None else result
+
+
+def calculate_rrg_multi_benchmark(symbols_data, benchmarks_data, window=20):
+    symbols_data, benchmarks_data = symbols_data.align(benchmarks_data, join='inner', axis=0)
+    rs_ratio, rs_mom = rrg_tradingview_multi(as_float_array(symbols_data), as_float_array(benchmarks_data), window)
+    return RRGCube(symbols_data.index, benchmarks_data.columns, symbols_data.columns, rs_ratio, rs_mom)
+
+
+def rolling_mean_std_2d(values, window, block=256):
+    # Rolling mean and population std (ddof=0) over axis 0 for all columns at once, from
+    # cumulative sums of x and x^2. Sums restart every `block` output rows and each block
+    # is centred on its own mean, which keeps the E[x^2] - E[x]^2 cancellation small on
+    # long, trending series. Windows containing a NaN give NaN, as pandas rolling does.
+    values = np.asarray(values, dtype=np.float64)
+    n_rows = values.shape[0]
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    zeros = np.zeros((1,) + values.shape[1:])
+    for first in range(window - 1, n_rows, block):
+        last = min(first + block, n_rows)
+        segment = values[first - window + 1:last]
+        missing = np.isnan(segment)
+        center = np.nan_to_num(np.nanmean(np.where(missing.all(axis=0), 0.0, segment), axis=0))
+        centered = np.where(missing, 0.0, segment - center)
+        s1 = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+        s2 = np.concatenate([zeros, np.cumsum(centered * centered, axis=0)])
+        nans = np.concatenate([zeros, np.cumsum(missing, axis=0)])
+        complete = (nans[window:] - nans[:-window]) == 0
+        win_mean = (s1[window:] - s1[:-window]) / window
+        win_var = np.maximum((s2[window:] - s2[:-window]) / window - win_mean * win_mean, 0.0)
+        mean[first:last] = np.where(complete, win_mean + center, np.nan)
+        std[first:last] = np.where(complete, np.sqrt(win_var), np.nan)
+    return mean, std
+
+
+def rrg_zscore_2d(prices, benchmark, window):
+    # JdK-style RS-Ratio / RS-Momentum as rolling z-scores of RS and of its one-bar rate
+    # of change; both outputs are masked to the rows where both are defined.
+    rs = np.asarray(prices) / np.asarray(benchmark)[:, None] * 100
+    rs_roc = np.full(rs.shape, np.nan)
+    rs_roc[1:] = 100 * (rs[1:] / rs[:-1] - 1)
+    rs_mean, rs_std = rolling_mean_std_2d(rs, window)
+    roc_mean, roc_std = rolling_mean_std_2d(rs_roc, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs_ratio = 100 + (rs - rs_mean) / rs_std
+        rs_mom = 100 + (rs_roc - roc_mean) / roc_std
+    aligned = ~(np.isnan(rs_ratio) | np.isnan(rs_mom))
+    dtype = np.asarray(prices).dtype
+    return np.where(aligned, rs_ratio, np.nan).astype(dtype, copy=False), np.where(aligned, rs_mom, np.nan).astype(dtype, copy=False)
+
+
+def calculate_rrg_batch_zscore(symbols_data, benchmark_prices, window=21):
+    symbols_data, benchmark_prices = symbols_data.align(benchmark_prices, join='inner', axis=0)
+    rs_ratio, rs_mom = rrg_zscore_2d(as_float_array(symbols_data), as_float_array(benchmark_prices), window)
+    return RRGBatchResult(symbols_data.index, symbols_data.columns, rs_ratio, rs_mom)
+
+
+class WeightedPrefixSums:
+    # Prefix sums of x and i*x (plus NaN counts) over axis 0, from which the simple and the
+    # linearly weighted moving average for any window up to `max_window` is a difference of
+    # two rows: O(1) per output instead of O(window). The sums restart every `block` output
+    # rows, each block centred on its own mean, so the i*x sums stay small on long series.
+    def __init__(self, values, max_window, block=256):
+        values = np.asarray(values, dtype=np.float64)
+        self.shape = values.shape
+        self.max_window = max_window
+        self._blocks = []
+        zeros = np.zeros((1,) + values.shape[1:])
+        for first in range(0, values.shape[0], block):
+            start = max(0, first - max_window + 1)
+            segment = values[start:min(first + block, values.shape[0])]
+            missing = np.isnan(segment)
+            center = np.nan_to_num(np.nanmean(np.where(missing.all(axis=0), 0.0, segment), axis=0))
+            centered = np.where(missing, 0.0, segment - center)
+            steps = np.arange(len(segment)).reshape((-1,) + (1,) * (values.ndim - 1))
+            self._blocks.append((
+                first, start, center,
+                np.concatenate([zeros, np.cumsum(centered, axis=0)]),
+                np.concatenate([zeros, np.cumsum(steps * centered, axis=0)]),
+                np.concatenate([zeros, np.cumsum(missing, axis=0)])
+            ))
+
+    def mean(self, window):
+        # Simple moving average; a window containing a NaN gives NaN, as pandas rolling does.
+        if window > self.max_window:
+            raise ValueError(f"window {window} exceeds max_window {self.max_window}")
+        out = np.full(self.shape, np.nan)
+        for first, start, center, s0, _, nans in self._blocks:
+            end = start + len(s0) - 1
+            first = max(first, window - 1)
+            if first >= end:
+                continue
+            hi = slice(first - start + 1, end - start + 1)
+            lo = slice(first - start + 1 - window, end - start + 1 - window)
+            complete = (nans[hi] - nans[lo]) == 0
+            out[first:end] = np.where(complete, (s0[hi] - s0[lo]) / window + center, np.nan)
+        return out
+
+    def wma(self, window):
+        # Same values as wma_2d(values, window); a window containing a NaN gives NaN.
+        if window > self.max_window:
+            raise ValueError(f"window {window} exceeds max_window {self.max_window}")
+        out = np.full(self.shape, np.nan)
+        for first, start, center, s0, s1, nans in self._blocks:
+            end = start + len(s0) - 1
+            first = max(first, window - 1)
+            if first >= end:
+                continue
+            hi = slice(first - start + 1, end - start + 1)
+            lo = slice(first - start + 1 - window, end - start + 1 - window)
+            # sum of (i - lo + 1) * x_i over the window, with lo the first row inside it
+            offset = np.arange(lo.start, lo.stop).reshape((-1,) + (1,) * (len(self.shape) - 1)) - 1
+            weighted = (s1[hi] - s1[lo]) - offset * (s0[hi] - s0[lo])
+            complete = (nans[hi] - nans[lo]) == 0
+            out[first:end] = np.where(complete, weighted / (window * (window + 1) / 2) + center, np.nan)
+        return out
+
+
+def ma_distance_sweep(values, windows, block=256):
+    # Percent distance of each value from its simple moving average, for every window in
+    # `windows`, filled into one pre-allocated (windows x dates x symbols) array; all
+    # windows share one set of prefix sums.
+    values = np.asarray(values)
+    sums = WeightedPrefixSums(values, max(windows), block)
+    out = np.empty((len(windows),) + values.shape, dtype=values.dtype if values.dtype == np.float32 else np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, window in enumerate(windows):
+            mean = sums.mean(window)
+            out[i] = (values - mean) / mean * 100
+    return out
+
+
+class MADistanceSweep:
+    # Percent distance from the simple moving average for a set of windows, stored as
+    # (windows x dates x symbols); any short/long pair of them is a lookup.
+    def __init__(self, windows, dates, symbols, distance):
+        self.windows = list(windows)
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.distance = distance
+
+    def __contains__(self, window):
+        return window in self.windows
+
+    def for_pair(self, short, long, symbols=None):
+        result = RRGBatchResult(
+            self.dates, self.symbols, self.distance[self.windows.index(short)], self.distance[self.windows.index(long)],
+            metrics=("ShortMA", "LongMA")
+        )
+        return result.select(symbols) if symbols is not None else result
+
+
+def calculate_ma_sweep(symbols_data, windows, benchmark_prices=None):
+    # With `benchmark_prices` the distances are measured on relative strength (price / benchmark).
+    windows = sorted(set(windows))
+    if benchmark_prices is None:
+        values = as_float_array(symbols_data)
+    else:
+        symbols_data, benchmark_prices = symbols_data.align(benchmark_prices, join='inner', axis=0)
+        values = as_float_array(symbols_data) / as_float_array(benchmark_prices)[:, None]
+    return MADistanceSweep(windows, symbols_data.index, symbols_data.columns, ma_distance_sweep(values, windows))
+
+
+def rrg_tradingview_sweep(prices, benchmark, windows, block=256):
+    # TradingView RS-Ratio / RS-Momentum for every window in `windows` as (windows x dates
+    # x symbols) arrays, or (windows x dates x benchmarks x symbols) for a (dates x benchmarks)
+    # `benchmark`. RS and its prefix sums are built once and shared by all windows; the two
+    # later smoothing passes depend on the window and use their own prefix sums.
+    prices = np.asarray(prices)
+    benchmark = np.asarray(benchmark)
+    if benchmark.ndim == 2:
+        rs = prices[:, None, :] / benchmark[:, :, None]
+    else:
+        rs = prices / benchmark[:, None]
+    rs_sums = WeightedPrefixSums(rs, max(windows), block)
+    shape = (len(windows),) + rs.shape
+    dtype = prices.dtype if prices.dtype == np.float32 else np.float64
+    rs_ratio = np.empty(shape, dtype=dtype)
+    rs_mom = np.empty(shape, dtype=dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i, window in enumerate(windows):
+            ratio = WeightedPrefixSums(rs / rs_sums.wma(window), window, block).wma(window) * 100
+            rs_ratio[i] = ratio
+            rs_mom[i] = ratio / WeightedPrefixSums(ratio, window, block).wma(window) * 100
+    return rs_ratio, rs_mom
+
+
+class RRGSweep:
+    # RS-Ratio / RS-Momentum for a range of windows, stored as (windows x dates x symbols),
+    # or (windows x dates x benchmarks x symbols) when swept against several benchmarks.
+    def __init__(self, windows, dates, symbols, rs_ratio, rs_momentum, benchmarks=None):
+        self.windows = list(windows)
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.rs_ratio = rs_ratio
+        self.rs_momentum = rs_momentum
+        self.benchmarks = list(benchmarks) if benchmarks is not None else None
+
+    def __contains__(self, window):
+        return window in self.windows
+
+    def for_window(self, window, symbols=None, benchmark=None):
+        w = self.windows.index(window)
+        rs_ratio, rs_momentum = self.rs_ratio[w], self.rs_momentum[w]
+        if self.benchmarks is not None:
+            b = self.benchmarks.index(benchmark)
+            rs_ratio, rs_momentum = rs_ratio[:, b, :], rs_momentum[:, b, :]
+        result = RRGBatchResult(self.dates, self.symbols, rs_ratio, rs_momentum)
+        return result.select(symbols) if symbols is not None else result
+
+
+def calculate_rrg_sweep(symbols_data, benchmark_prices, windows):
+    symbols_data, benchmark_prices = symbols_data.align(benchmark_prices, join='inner', axis=0)
+    windows = sorted(set(windows))
+    rs_ratio, rs_mom = rrg_tradingview_sweep(as_float_array(symbols_data), as_float_array(benchmark_prices), windows)
+    return RRGSweep(windows, symbols_data.index, symbols_data.columns, rs_ratio, rs_mom)
+
+
+def calculate_rrg_multi_benchmark_sweep(symbols_data, benchmarks_data, windows):
+    symbols_data, benchmarks_data = symbols_data.align(benchmarks_data, join='inner', axis=0)
+    windows = sorted(set(windows))
+    rs_ratio, rs_mom = rrg_tradingview_sweep(as_float_array(symbols_data), as_float_array(benchmarks_data), windows)
+    return RRGSweep(windows, symbols_data.index, symbols_data.columns, rs_ratio, rs_mom, benchmarks=benchmarks_data.columns)
@@ -0,0 +1,101 @@
+import argparse
+
+import numpy as np
+
+import pandas as pd
+
+from data_reader import DataReader
+
+from relative_rotation import resample_prices
+
+from rrg_engine import calculate_rrg_batch
+
+QUADRANT_ORDER = ["Leading", "Improving", "Weakening", "Lagging"]
+
+# Sort direction per screener column: quadrants in QUADRANT_ORDER, the farthest and fastest
+# movers first, headings counter-clockwise from the RS-Ratio axis.
+SORT_ASCENDING = {"quadrant": True, "distance": False, "heading": True, "speed": False,
+                  "RS_Ratio": False, "RS_Momentum": False, "symbol": True}
+DEFAULT_SORT = ("quadrant", "distance", "heading", "speed")
+
+
+def quadrant_codes(rs_ratio, rs_momentum):
+    # Index into QUADRANT_ORDER per cell, -1 where either metric is missing.
+    # Leading 0, Improving 1 (RS-Ratio below 100), Weakening 2 (RS-Momentum below 100), Lagging 3.
+    codes = (np.asarray(rs_ratio) < 100).astype(np.int8) + 2 * (np.asarray(rs_momentum) < 100).astype(np.int8)
+    return np.where(np.isnan(rs_ratio) | np.isnan(rs_momentum), np.int8(-1), codes)
+
+
+def quadrant_labels(rs_ratio, rs_momentum):
+    return np.array(QUADRANT_ORDER)[np.maximum(quadrant_codes(rs_ratio, rs_momentum), 0)]
+
+
+def screen_rrg_result(result, lookback=1, sort_by=DEFAULT_SORT):
+    # One row per symbol from its latest valid RS-Ratio/RS-Momentum point: quadrant,
+    # distance from (100, 100), heading of the move over `lookback` bars (degrees
+    # counter-clockwise from the RS-Ratio axis) and speed (distance moved per bar),
+    # ranked by the `sort_by` columns in the SORT_ASCENDING directions.
+    valid = ~(np.isnan(result.rs_ratio) | np.isnan(result.rs_momentum))
+    has_value = valid.any(axis=0)
+    n_dates = valid.shape[0]
+    last = n_dates - 1 - np.argmax(valid[::-1], axis=0)
+    prev = np.clip(last - lookback, 0, None)
+    cols = np.arange(valid.shape[1])
+
+    ratio = result.rs_ratio[last, cols]
+    momentum = result.rs_momentum[last, cols]
+    d_ratio = ratio - result.rs_ratio[prev, cols]
+    d_momentum = momentum - result.rs_momentum[prev, cols]
+
+    table = pd.DataFrame({
+        "symbol": result.symbols,
+        "date": np.asarray(result.dates)[last],
+        "RS_Ratio": ratio,
+        "RS_Momentum": momentum,
+        "quadrant": quadrant_labels(ratio, momentum),
+        "distance": np.hypot(ratio - 100, momentum - 100),
+        "heading": np.degrees(np.arctan2(d_momentum, d_ratio)) % 360,
+        "speed": np.hypot(d_ratio, d_momentum) / np.maximum(last - prev, 1),
+    })[has_value]
+    table["quadrant"] = pd.Categorical(table["quadrant"], categories=QUADRANT_ORDER, ordered=True)
+    sort_by = list(sort_by)
+    return table.sort_values(sort_by, ascending=[SORT_ASCENDING[c] for c in sort_by]).reset_index(drop=True)
+
+
+def screen_rotation(rrg_obj, lookback=1, sort_by=DEFAULT_SORT):
+    # Screener over an already-loaded RelativeRotationData (uses its full batch result).
+    if rrg_obj.rrg_result_full is not None:
+        return screen_rrg_result(rrg_obj.rrg_result_full, lookback=lookback, sort_by=sort_by)
+    if rrg_obj.rrg_result is None:
+        rrg_obj.process_rrg_data()
+    return screen_rrg_result(rrg_obj.rrg_result, lookback=lookback, sort_by=sort_by)
+
+
+def screen_universe(local_data_path, tickers_file, benchmark, window=20, frequency="daily", lookback=1, sort_by=DEFAULT_SORT):
+    # Headless screener over every ticker listed in `tickers_file` (DataReader.read_tickers).
+    reader = DataReader({'source_market_data': local_data_path, 'dest_tickers_data': ""}, combined_file=tickers_file)
+    universe = [t for t in dict.fromkeys(reader.read_tickers()) if t != benchmark]
+    prices = resample_prices(reader.read_close_matrix(universe + [benchmark]), frequency)
+    if benchmark not in prices.columns:
+        raise FileNotFoundError(f"No data file for benchmark '{benchmark}' in {local_data_path}.")
+    symbols = [t for t in universe if t in prices.columns]
+    result = calculate_rrg_batch(prices[symbols], prices[benchmark], window=window)
+    return screen_rrg_result(result, lookback=lookback, sort_by=sort_by)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank a ticker universe by RRG quadrant against a benchmark.")
+    parser.add_argument("source", help="folder containing <ticker>.csv files")
+    parser.add_argument("tickers_file", help="CSV with a 'ticker' column listing the universe")
+    parser.add_argument("--benchmark", default="SPY")
+    parser.add_argument("--window", type=int, default=20)
+    parser.add_argument("--frequency", choices=["daily", "weekly", "monthly"], default="daily")
+    parser.add_argument("--lookback", type=int, default=1, help="bars used for heading and speed")
+    parser.add_argument("--sort-by", nargs="+", choices=list(SORT_ASCENDING), default=list(DEFAULT_SORT))
+    parser.add_argument("--out", default=None, help="write the table to this CSV instead of printing it")
+    args = parser.parse_args()
+    table = screen_universe(args.source, args.tickers_file, args.benchmark, args.window, args.frequency, args.lookback, args.sort_by)
+    if args.out:
+        table.to_csv(args.out, index=False)
+    else:
+        print(table.to_string(index=False))
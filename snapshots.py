@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+import pandas as pd
+
+from rrg_engine import RRGBatchResult
+
+
+# Dashboard data source -> precompute.py --source name recorded in each snapshot.
+DATA_SOURCES = {"Yahoo Finance": "yahoo", "Local Folder": "local"}
+
+
+def snapshot_path(snapshot_dir, benchmark, frequency, window):
+    return os.path.join(snapshot_dir, f"rrg_{benchmark}_{frequency}_w{window}.npz")
+
+
+def save_snapshot(result, path, source, study="price", as_of=None):
+    # Compact columnar snapshot: day-resolution dates, symbol names and float32 matrices,
+    # plus the price source and study they were computed from and the date of the last
+    # daily close used (`as_of`, by default the last row's date).
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        source=np.asarray(source),
+        study=np.asarray(study),
+        as_of=np.datetime64(pd.Timestamp(as_of if as_of is not None else result.dates[-1]).date(), "D"),
+        dates=np.asarray(result.dates, dtype="datetime64[D]"),
+        symbols=np.asarray(result.symbols, dtype=str),
+        rs_ratio=result.rs_ratio.astype(np.float32),
+        rs_momentum=result.rs_momentum.astype(np.float32)
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_snapshot(snapshot_dir, benchmark, frequency, window, source, study="price", end=None):
+    # None unless the snapshot was computed from the same source and study; snapshots
+    # written before these were recorded never match. With `end`, rows after it are
+    # dropped, and a weekly/monthly snapshot built from closes after `end` is not used
+    # because its last bar would include them.
+    path = snapshot_path(snapshot_dir, benchmark, frequency, window)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if "as_of" not in data.files or str(data["source"]) != source or str(data["study"]) != study:
+            return None
+        if end is not None and frequency != "daily" and pd.Timestamp(data["as_of"].item()) > pd.Timestamp(end):
+            return None
+        result = RRGBatchResult(
+            pd.DatetimeIndex(data["dates"].astype("datetime64[ns]"), name="Date"),
+            data["symbols"].tolist(),
+            data["rs_ratio"].astype(np.float64),
+            data["rs_momentum"].astype(np.float64)
+        )
+    return result.until(end) if end is not None else result